@@ -1,27 +1,45 @@
+import copy
 import logging
 import logging.config
 
-
-def setup_logging(default_level=logging.INFO):
-    """Configure logging for the entire package."""
-    logging_config = {
-        "version": 1,
-        "disable_existing_loggers": False,
-        "formatters": {
-            "standard": {
-                "format": "[%(asctime)s] [%(levelname)s] %(name)s: %(message)s"
-            },
-        },
-        "handlers": {
-            "console": {
-                "class": "logging.StreamHandler",
-                "formatter": "standard",
-                "level": "INFO",
-            },
+_LOGGING_CONFIG = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "standard": {
+            "format": "[%(asctime)s] [%(levelname)s] %(name)s: %(message)s"
         },
-        "root": {
-            "handlers": ["console"],
-            "level": default_level,
+    },
+    "handlers": {
+        "console": {
+            "class": "logging.StreamHandler",
+            "formatter": "standard",
+            "level": "INFO",
         },
-    }
+    },
+    "root": {
+        "handlers": ["console"],
+        "level": logging.INFO,
+    },
+}
+
+# Root level applied by the last setup_logging() call, None until the first one
+_configured_level = None
+
+
+def setup_logging(default_level=logging.INFO, force: bool = False):
+    """Configure logging for the entire package.
+
+    Repeated calls with the level already configured are no-ops; a different
+    level, or force=True, applies the config again.
+    """
+    global _configured_level
+    if default_level == _configured_level and not force:
+        return
+
+    logging_config = _LOGGING_CONFIG
+    if default_level != logging_config["root"]["level"]:
+        logging_config = copy.deepcopy(_LOGGING_CONFIG)
+        logging_config["root"]["level"] = default_level
     logging.config.dictConfig(logging_config)
+    _configured_level = default_level
@@ -1,5 +1,9 @@
-from custom_langchain_model.helpers.parse_json_schema import convert_to_baml_tool
+from custom_langchain_model.helpers.parse_json_schema import (
+    build_baml_tool_builder_once,
+    convert_to_baml_tool,
+)
 
 __all__ = [
+    "build_baml_tool_builder_once",
     "convert_to_baml_tool"
 ]
\ No newline at end of file
@@ -1,19 +1,286 @@
-from typing import Tuple, Optional
-import base64
-import requests
+from typing import Tuple, Optional, NamedTuple
+from collections import OrderedDict
+import asyncio
+import importlib.util
+import threading
+import time
+import weakref
+try:
+    # SIMD-accelerated codec, same API as the stdlib module
+    import pybase64 as base64
+except ImportError:
+    import base64
+import httpx
 import mimetypes
-from urllib.parse import urlparse
+from urllib.parse import urlparse, unquote_to_bytes
 import json
+from concurrent.futures import ThreadPoolExecutor
 from custom_langchain_model.baml_client.types import ContentBlock, ToolCall
 from baml_py import Image as BamlImage
 
 import logging
 logger = logging.getLogger(__name__)
 
+# HTTP/2 lets concurrent image fetches to one host share a single connection;
+# it needs the optional `h2` package (httpx[http2]), otherwise use HTTP/1.1
+_HTTP2 = importlib.util.find_spec("h2") is not None
 
-def get_image_base64_from_url(url: str, timeout: int = 10) -> Optional[Tuple[str, str]]:
+_CLIENT_OPTIONS = {
+    "http2": _HTTP2,
+    "headers": {"User-Agent": "Mozilla/5.0 (compatible; ImageFetcher/1.0)"},
+    "follow_redirects": True,
+    "limits": httpx.Limits(max_connections=20, max_keepalive_connections=20),
+}
+
+# Shared client so repeated image downloads reuse keep-alive connections
+_client = httpx.Client(**_CLIENT_OPTIONS)
+
+# Async clients, created lazily one per event loop since their connections are
+# loop-bound. Weakly keyed so a loop that is garbage collected takes its client
+# with it instead of the client outliving it.
+_aclients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+_aclients_lock = threading.Lock()
+
+
+def get_client() -> httpx.Client:
+    """
+    Return the shared httpx.Client used for image fetching.
+
+    Callers can tune it, e.g. by replacing its transport with one that retries.
+    """
+    return _client
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the shared httpx.AsyncClient for the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _aclients_lock:
+        # Forget clients of loops that were closed but not yet collected
+        for stale in [l for l in _aclients if l.is_closed()]:
+            del _aclients[stale]
+        client = _aclients.get(loop)
+        if client is None or client.is_closed:
+            client = _aclients[loop] = httpx.AsyncClient(**_CLIENT_OPTIONS)
+        return client
+
+
+async def aclose_async_client() -> None:
+    """
+    Close the shared httpx.AsyncClient of the running event loop, if any.
+
+    Call it before the loop shuts down to release its pooled connections
+    cleanly; a later get_async_client() on the same loop creates a new client.
+    """
+    with _aclients_lock:
+        client = _aclients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+# Shared pool for fetching several images of one message concurrently
+_IMAGE_FETCH_WORKERS = 8
+_image_executor = ThreadPoolExecutor(
+    max_workers=_IMAGE_FETCH_WORKERS,
+    thread_name_prefix="image-fetch"
+)
+
+# Small TTL + LRU cache of fetched images, keyed by URL. Bounded by the total
+# size of the cached base64 strings rather than the entry count, so a few
+# large images cannot pin gigabytes. Images above the per-entry cap (8 MiB of
+# base64, about 6 MB raw: enough for typical photos and screenshots) are still
+# fetched, just not cached, so a single one can't flush the whole cache.
+_IMAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+_IMAGE_CACHE_MAX_ENTRY_BYTES = _IMAGE_CACHE_MAX_BYTES // 8
+_IMAGE_CACHE_TTL = 3600.0  # seconds
+
+
+class _CachedImage(NamedTuple):
+    mime_type: str
+    base64_string: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+
+
+_image_cache: "OrderedDict[str, _CachedImage]" = OrderedDict()
+_image_cache_lock = threading.Lock()
+# Running total of len(base64_string) over the cached entries
+_image_cache_bytes = 0
+
+
+def _image_cache_get(url: str) -> Optional[_CachedImage]:
+    with _image_cache_lock:
+        entry = _image_cache.get(url)
+        if entry is not None:
+            _image_cache.move_to_end(url)
+        return entry
+
+
+def _image_cache_put(url: str, entry: _CachedImage) -> None:
+    global _image_cache_bytes
+    size = len(entry.base64_string)
+    with _image_cache_lock:
+        previous = _image_cache.pop(url, None)
+        if previous is not None:
+            _image_cache_bytes -= len(previous.base64_string)
+        if size > _IMAGE_CACHE_MAX_ENTRY_BYTES:
+            return
+        _image_cache[url] = entry
+        _image_cache_bytes += size
+        while _image_cache_bytes > _IMAGE_CACHE_MAX_BYTES:
+            _, evicted = _image_cache.popitem(last=False)
+            _image_cache_bytes -= len(evicted.base64_string)
+
+
+def clear_image_cache() -> None:
+    """Drop all cached images fetched by get_image_base64_from_url."""
+    global _image_cache_bytes
+    with _image_cache_lock:
+        _image_cache.clear()
+        _image_cache_bytes = 0
+
+# Read size for streamed encoding; a multiple of 3 so no padding is emitted mid-stream
+_B64_READ_SIZE = 3 * 16 * 1024
+
+# Upper bound on a downloaded image body, guards against pathological URLs
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+
+
+# Leading bytes kept from the body for MIME sniffing
+_SNIFF_LEN = 12
+
+
+def _sniff_mime(data: bytes) -> Optional[str]:
+    """Detect common image formats from their magic bytes."""
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    if data[:3] == b"\xff\xd8\xff":
+        return "image/jpeg"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[4:12] in (b"ftypavif", b"ftypavis"):
+        return "image/avif"
+    return None
+
+
+class _Base64StreamEncoder:
+    """
+    Incremental base64 encoder for a streamed response body.
+
+    Avoids holding the full raw body and its encoded copy in memory at once.
+    Shared by the sync and async fetchers, which only differ in how they
+    iterate the body.
+    """
+
+    def __init__(self, max_bytes: int = MAX_IMAGE_BYTES):
+        self.max_bytes = max_bytes
+        self._out = bytearray()
+        self._carry = b""
+        # First bytes of the body for MIME sniffing
+        self.head = b""
+        self._total = 0
+
+    def feed(self, chunk: bytes) -> None:
+        """
+        Raises:
+            ValueError: If the body grows beyond max_bytes
+        """
+        if len(self.head) < _SNIFF_LEN:
+            self.head += chunk[:_SNIFF_LEN - len(self.head)]
+        self._total += len(chunk)
+        if self._total > self.max_bytes:
+            raise ValueError(f"Image body exceeds {self.max_bytes} bytes")
+        if self._carry:
+            chunk = self._carry + chunk
+        # Chunks may not be 3-aligned; keep the remainder for the next one
+        cut = len(chunk) - len(chunk) % 3
+        self._out += base64.b64encode(chunk[:cut])
+        self._carry = chunk[cut:]
+
+    def finish(self) -> str:
+        if self._carry:
+            self._out += base64.b64encode(self._carry)
+            self._carry = b""
+        return self._out.decode("ascii")
+
+
+def _revalidation_headers(cached: Optional[_CachedImage]) -> dict:
+    # Stale entry: revalidate with a conditional GET instead of refetching blindly
+    headers = {}
+    if cached is not None:
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+    return headers
+
+
+def _check_content_length(response: httpx.Response, max_bytes: int) -> None:
+    # Reject oversized bodies before reading anything
+    content_length = int(response.headers.get("Content-Length") or 0)
+    if content_length > max_bytes:
+        raise ValueError(
+            f"Image is {content_length} bytes, exceeds limit of {max_bytes}"
+        )
+
+
+def _resolve_mime_type(url: str, response: httpx.Response, head: bytes) -> str:
+    # Extract MIME type from Content-Type header (cleaned)
+    content_type = response.headers.get("Content-Type", "").split(";")[0].strip()
+    
+    # Fallback 1: Sniff magic bytes of the body
+    if not content_type or content_type == "application/octet-stream":
+        content_type = _sniff_mime(head)
+
+    # Fallback 2: Guess from URL extension
+    if not content_type:
+        parsed = urlparse(url)
+        content_type, _ = mimetypes.guess_type(parsed.path)
+    
+    # Fallback 3: Default to JPEG if still unknown
+    if not content_type or not content_type.startswith("image/"):
+        content_type = "image/jpeg"
+    return content_type
+
+
+def _store_fetched_image(url: str, response: httpx.Response, encoder: _Base64StreamEncoder) -> Tuple[str, str]:
+    content_type = _resolve_mime_type(url, response, encoder.head)
+    base64_string = encoder.finish()
+    _image_cache_put(url, _CachedImage(
+        mime_type=content_type,
+        base64_string=base64_string,
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+        stored_at=time.monotonic(),
+    ))
+    return content_type, base64_string
+
+
+def _fresh_cache_entry(url: str) -> Tuple[Optional[_CachedImage], bool]:
+    cached = _image_cache_get(url)
+    is_fresh = cached is not None and time.monotonic() - cached.stored_at < _IMAGE_CACHE_TTL
+    return cached, is_fresh
+
+
+def _refresh_cache_entry(url: str, cached: _CachedImage) -> Tuple[str, str]:
+    # 304 Not Modified: keep the cached body, restart its TTL
+    _image_cache_put(url, cached._replace(stored_at=time.monotonic()))
+    return cached.mime_type, cached.base64_string
+
+
+def get_image_base64_from_url(
+    url: str,
+    timeout: int = 10,
+    max_bytes: int = MAX_IMAGE_BYTES
+) -> Optional[Tuple[str, str]]:
     """
     Fetch image from URL and return (mime_type, base64_string)
+
+    Bodies larger than max_bytes are rejected, from Content-Length when the
+    server sends it, otherwise while streaming.
     
     Returns:
         Tuple[str, str]: (MIME type like 'image/png', base64-encoded string)
@@ -24,109 +291,256 @@ def get_image_base64_from_url(url: str, timeout: int = 10) -> Optional[Tuple[str
         # mime = "image/png"
         # b64 = "iVBORw0KGgoAAAANSUhEUgAA..."
     """
+    cached, is_fresh = _fresh_cache_entry(url)
+    if is_fresh:
+        return cached.mime_type, cached.base64_string
+
     try:
-        # Fetch image with timeout and user-agent
-        response = requests.get(
-            url,
-            timeout=timeout,
-            headers={"User-Agent": "Mozilla/5.0 (compatible; ImageFetcher/1.0)"}
-        )
-        response.raise_for_status()
-        
-        # Extract MIME type from Content-Type header (cleaned)
-        content_type = response.headers.get("Content-Type", "").split(";")[0].strip()
-        
-        # Fallback 1: Guess from URL extension
-        if not content_type or content_type == "application/octet-stream":
-            parsed = urlparse(url)
-            content_type, _ = mimetypes.guess_type(parsed.path)
-        
-        # Fallback 2: Default to JPEG if still unknown
-        if not content_type or not content_type.startswith("image/"):
-            content_type = "image/jpeg"
-        
-        # Encode to base64 string (UTF-8 decoded)
-        base64_string = base64.b64encode(response.content).decode("utf-8")
-        
-        return content_type, base64_string
+        # Fetch image with timeout (user-agent is set on the shared client)
+        with _client.stream(
+            "GET", url, timeout=timeout, headers=_revalidation_headers(cached)
+        ) as response:
+            if cached is not None and response.status_code == 304:
+                return _refresh_cache_entry(url, cached)
+
+            response.raise_for_status()
+            _check_content_length(response, max_bytes)
+
+            # Encode to base64 string while streaming the body
+            encoder = _Base64StreamEncoder(max_bytes=max_bytes)
+            for chunk in response.iter_bytes(_B64_READ_SIZE):
+                encoder.feed(chunk)
+            return _store_fetched_image(url, response, encoder)
         
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Network error fetching {url}: {e}")
-    except Exception as e:
-        print(f"❌ Processing error for {url}: {e}")
+    except httpx.HTTPError as e:
+        logger.warning("Network error fetching %s: %s", url, e)
+    except Exception:
+        logger.exception("Processing error for %s", url)
     
     return None
 
+
+async def aget_image_base64_from_url(
+    url: str,
+    timeout: int = 10,
+    max_bytes: int = MAX_IMAGE_BYTES
+) -> Optional[Tuple[str, str]]:
+    """
+    Async counterpart of get_image_base64_from_url, sharing its cache.
+
+    Returns:
+        Tuple[str, str]: (MIME type like 'image/png', base64-encoded string)
+        None: On failure (with error logged)
+    """
+    cached, is_fresh = _fresh_cache_entry(url)
+    if is_fresh:
+        return cached.mime_type, cached.base64_string
+
+    try:
+        async with get_async_client().stream(
+            "GET", url, timeout=timeout, headers=_revalidation_headers(cached)
+        ) as response:
+            if cached is not None and response.status_code == 304:
+                return _refresh_cache_entry(url, cached)
+
+            response.raise_for_status()
+            _check_content_length(response, max_bytes)
+
+            encoder = _Base64StreamEncoder(max_bytes=max_bytes)
+            async for chunk in response.aiter_bytes(_B64_READ_SIZE):
+                encoder.feed(chunk)
+            return _store_fetched_image(url, response, encoder)
+
+    except httpx.HTTPError as e:
+        logger.warning("Network error fetching %s: %s", url, e)
+    except Exception:
+        logger.exception("Processing error for %s", url)
+
+    return None
+
+def _image_from_fetch_result(url: str, result: Optional[Tuple[str, str]]) -> BamlImage:
+    if result is None:
+        raise ValueError(f"Failed to fetch image from URL: {url}")
+    mime_type, base64_string = result
+    return BamlImage.from_base64(mime_type, base64_string)
+
+def _image_from_data_uri(url: str) -> BamlImage:
+    """
+    Build an image from an inline data URI without any network call.
+
+    e.g. "data:image/png;base64,iVBORw0KGgo..."
+    """
+    meta, sep, payload = url[len("data:"):].partition(",")
+    if not sep:
+        raise ValueError("Malformed data URI: missing ',' separator")
+    mime_type, _, params = meta.partition(";")
+    if not mime_type.startswith("image/"):
+        mime_type = "image/jpeg"
+    if "base64" in params.split(";"):
+        # BAML takes the base64 string as is, no need to decode it
+        return BamlImage.from_base64(mime_type, payload)
+    # Percent-encoded payload
+    return BamlImage.from_base64(mime_type, base64.b64encode(unquote_to_bytes(payload)).decode("ascii"))
+
 def convert_to_baml_image(block: dict) -> BamlImage:
     if block.get("url"):
+        url = block["url"]
+        if url.startswith("data:"):
+            return _image_from_data_uri(url)
         # convert to base64
         # due to vllm server got 500 Internal Server Error when passing url directly
-        url = block["url"]
-        result = get_image_base64_from_url(url)
-        if result is None:
-            raise ValueError(f"Failed to fetch image from URL: {url}")
-        mime_type, base64 = result
-        return BamlImage.from_base64(mime_type, base64)
+        return _image_from_fetch_result(url, get_image_base64_from_url(url))
     if block.get("base64"):
-        base64 = block["base64"]
         return BamlImage.from_base64(block["mime_type"], block["base64"])
 
     raise ValueError("Input image block must have either 'url' or 'base64' field.")
 
+async def aconvert_to_baml_image(block: dict) -> BamlImage:
+    if block.get("url") and not block["url"].startswith("data:"):
+        url = block["url"]
+        return _image_from_fetch_result(url, await aget_image_base64_from_url(url))
+    return convert_to_baml_image(block)
+
 from typing import List, Tuple, Dict, Any
 
-def convert_to_baml_content_block(content_blocks: List[Dict[str, Any]]) -> ContentBlock:
+def _is_image_block(block: Dict[str, Any]) -> bool:
+    return block.get("type") == "image" and (
+        "url" in block or ("base64" in block and "mime_type" in block)
+    )
+
+def _collect_image_blocks(content_blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        block for block in content_blocks
+        if isinstance(block, dict) and _is_image_block(block)
+    ]
+
+def _convert_image_blocks(content_blocks: List[Dict[str, Any]]) -> Dict[int, BamlImage]:
     """
-    Extract all text strings and image data from multi-modal content blocks.
-    
+    Convert every image block up front, fetching URL images concurrently.
+
     Returns:
-        ContentBlock: Baml ContentBlock with extracted text and image
+        Dict[int, BamlImage]: converted images keyed by id() of their block
+    """
+    img_blocks = _collect_image_blocks(content_blocks)
+    if len(img_blocks) <= 1:
+        return {id(block): convert_to_baml_image(block) for block in img_blocks}
+
+    # Overlap network I/O so latency is ~max(per-image) instead of the sum
+    images = _image_executor.map(convert_to_baml_image, img_blocks)
+    return {id(block): img for block, img in zip(img_blocks, images)}
+
+async def _aconvert_image_blocks(content_blocks: List[Dict[str, Any]]) -> Dict[int, BamlImage]:
+    """Async counterpart of _convert_image_blocks, fanning out with asyncio.gather."""
+    img_blocks = _collect_image_blocks(content_blocks)
+    images = await asyncio.gather(*(aconvert_to_baml_image(block) for block in img_blocks))
+    return {id(block): img for block, img in zip(img_blocks, images)}
+
+# ────────────────────────────────────────────────
+# Content block handlers, dispatched on block["type"]
+# Each takes (block, state) and returns the updated state
+# ────────────────────────────────────────────────
+
+def _handle_unknown(block: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
+    logger.warning(f"Skipping unknown content block: {block}")
+    return state
+
+def _handle_text(block: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
+    # Text block (Anthropic/OpenAI format)
+    text = block.get("text")
+    if not isinstance(text, str):
+        return _handle_unknown(block, state)
+    state["text_parts"].append(text)
+    return state
+
+def _handle_image(block: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
+    # Image block (langchain v1 format), either "url" or "base64" + "mime_type";
+    # already converted by _convert_image_blocks
+    if not _is_image_block(block):
+        return _handle_unknown(block, state)
+    state["image"] = state["converted_images"][id(block)]
+    return state
+
+def dumps_tool_args(args: Dict[str, Any]) -> str:
+    """
+    JSON for the arguments of a past tool call, as the model sees them in the prompt.
+
+    Kept in json.dumps()'s default form (", "/": " separators, ASCII-escaped) so the
+    prompt text, and any provider-side prompt caching keyed on it, stays the same.
+    orjson can't produce that form, so it isn't used here.
     """
-    text: str = ""
-    image: BamlImage | None = None 
-    tool_call: ToolCall | None = None
+    return json.dumps(args)
+
+
+def _handle_tool_call(block: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
+    # {'type': 'tool_call', 'id': '3f9e5d9d-ef81-476b-b5be-5bf48fa7f9f7', 'name': 'add', 'args': {'a': 60, 'b': 10}}
+    name = block.get("name")
+    args = block.get("args")
+    if not isinstance(name, str) or not isinstance(args, dict):
+        return _handle_unknown(block, state)
+    state["tool_call"] = ToolCall(
+        name=name,
+        args=dumps_tool_args(args)
+    )
+    return state
+
+_CONTENT_BLOCK_HANDLERS = {
+    "text": _handle_text,
+    "image": _handle_image,
+    "tool_call": _handle_tool_call,
+}
+
+def _build_content_block(
+    content_blocks: List[Dict[str, Any]],
+    converted_images: Dict[int, BamlImage]
+) -> ContentBlock:
+    state: Dict[str, Any] = {
+        "text_parts": [],
+        "image": None,
+        "tool_call": None,
+        "converted_images": converted_images,
+    }
     for block in content_blocks:
-        match block:
-            # ✅ Text block (Anthropic/OpenAI format)
-            case {"type": "text", "text": str(text)}:
-                text = text
-            
-            # ✅ Image block (langchain v1 format)
-            case {
-                    "type": "image", 
-                    "url": url
-                } as img_block:
-                baml_img = convert_to_baml_image(img_block)
-                image = baml_img
-            # Base64 image block
-            case {
-                    "type": "image", 
-                    "base64": base64_str,
-                    "mime_type": mime_type
-                } as img_block:
-                baml_img = convert_to_baml_image(img_block)
-                image = baml_img
-            # {'type': 'tool_call', 'id': '3f9e5d9d-ef81-476b-b5be-5bf48fa7f9f7', 'name': 'add', 'args': {'a': 60, 'b': 10}}
-            case {
-                    "type": "tool_call",
-                    "name": str(name),
-                    "args": dict(args)
-                }:
-                tool_call = ToolCall(
-                    name=name,
-                    args=json.dumps(args)
-                )
-            case _:
-                logger.warning(f"Skipping unknown content block: {block}")
+        if not isinstance(block, dict):
+            state = _handle_unknown(block, state)
+            continue
+        handler = _CONTENT_BLOCK_HANDLERS.get(block.get("type"), _handle_unknown)
+        state = handler(block, state)
                 
     return ContentBlock(
-        text=text,
-        img=image,
-        tool_call=tool_call
+        text="".join(state["text_parts"]),
+        img=state["image"],
+        tool_call=state["tool_call"]
     )
 
+def convert_to_baml_content_block(content_blocks: List[Dict[str, Any]]) -> ContentBlock:
+    """
+    Extract all text strings and image data from multi-modal content blocks.
+    
+    Returns:
+        ContentBlock: Baml ContentBlock with extracted text and image
+    """
+    return _build_content_block(content_blocks, _convert_image_blocks(content_blocks))
+
+async def aconvert_to_baml_content_block(content_blocks: List[Dict[str, Any]]) -> ContentBlock:
+    """
+    Async counterpart of convert_to_baml_content_block; image URLs are fetched
+    concurrently on the event loop instead of the thread pool.
+
+    Returns:
+        ContentBlock: Baml ContentBlock with extracted text and image
+    """
+    return _build_content_block(content_blocks, await _aconvert_image_blocks(content_blocks))
+
 __all__ = [
+    "get_client",
+    "get_async_client",
+    "aclose_async_client",
+    "clear_image_cache",
     "get_image_base64_from_url",
+    "aget_image_base64_from_url",
     "convert_to_baml_image",
+    "aconvert_to_baml_image",
     "convert_to_baml_content_block",
+    "aconvert_to_baml_content_block",
+    "dumps_tool_args",
 ]
\ No newline at end of file
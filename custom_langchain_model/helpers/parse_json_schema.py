@@ -1,91 +1,240 @@
+import hashlib
+import json
+import sys
+import threading
 import warnings
-from typing import Any, Dict, List, Optional, Union, Type, Callable
+import weakref
+from collections import OrderedDict
+from types import GeneratorType
+try:
+    # Rust JSON encoder, part of the speedups extra
+    import orjson
+except ImportError:
+    orjson = None
+from typing import Any, Dict, Generator, List, Optional, Tuple, Union, Type, Callable
 from custom_langchain_model.baml_client.type_builder import TypeBuilder, FieldType
 from pydantic import BaseModel
 from langchain_core.utils.function_calling import convert_to_openai_tool
 
+# Parsed class/function types shared by every SchemaAdder working on the same
+# TypeBuilder, keyed by a digest of the canonical schema JSON. Entries go away
+# together with their TypeBuilder.
+_GLOBAL_TYPE_CACHE: "weakref.WeakKeyDictionary[TypeBuilder, Dict[bytes, FieldType]]" = weakref.WeakKeyDictionary()
+
+
+def _schema_digest(json_schema: Dict[str, Any]) -> Optional[bytes]:
+    """
+    Stable digest of a JSON schema, independent of dict key order.
+
+    Returns None for schemas containing a $ref, whose meaning depends on the
+    root schema they were resolved against, so they are never shared.
+    """
+    canonical = None
+    if orjson is not None:
+        try:
+            canonical = orjson.dumps(json_schema, default=str, option=orjson.OPT_SORT_KEYS)
+        except TypeError:
+            # e.g. non-str keys, which orjson refuses to sort
+            pass
+    if canonical is None:
+        canonical = json.dumps(json_schema, sort_keys=True, default=str).encode()
+    if b'"$ref"' in canonical:
+        return None
+    return hashlib.blake2b(canonical, digest_size=16).digest()
+
+
+def _is_named_type(json_schema: Dict[str, Any]) -> bool:
+    """Whether parsing this schema adds a named class/enum to the TypeBuilder."""
+    type_ = json_schema.get("type")
+    if type_ == "object" or type_ == "function":
+        return True
+    return type_ == "string" and "enum" in json_schema and "title" in json_schema
+
+
+def _user_warnings_ignored() -> bool:
+    """
+    Whether the first warnings filter drops every UserWarning, so the message
+    doesn't need to be built (e.g. under warnings.simplefilter("ignore")).
+    """
+    if not warnings.filters:
+        return False
+    action, message, category, module, lineno = warnings.filters[0]
+    return (
+        action == "ignore" and message is None and module is None
+        and lineno == 0 and issubclass(UserWarning, category)
+    )
+
+
+# Placeholder in SchemaAdder._ref_cache while a $ref target is being parsed
+_PARSING: Any = object()
+
+
+# A parser step is a generator: it yields each child schema it needs and is
+# sent back the child's FieldType, then returns its own FieldType.
+ParseStep = Generator[Dict[str, Any], FieldType, FieldType]
+
+
 class SchemaAdder:
     def __init__(self, tb: TypeBuilder, schema: Dict[str, Any]):
         self.tb = tb
         self.schema = schema
         self._ref_cache = {}
         self._class_cache = {}  # Cache for already created classes
-
-    def _parse_object(self, json_schema: Dict[str, Any]) -> FieldType:
-        assert json_schema["type"] == "object"
+        # Classes whose properties are still being parsed, keyed by id() of their
+        # schema, so a $ref back to one of them refers to the class instead of recursing
+        self._open_classes: Dict[int, Any] = {}
+        # Parsed sub-schemas keyed by id() of the schema dict
+        # (sub-schemas are kept alive by self.schema for the parser's lifetime)
+        self._parse_cache: Dict[int, FieldType] = {}
+        # Digests of named-type sub-schemas, so each is hashed at most once
+        self._digests: Dict[int, Optional[bytes]] = {}
+        # Structural cache for named types (classes, enums, tools), shared
+        # with other parsers on the same TypeBuilder
+        self._shared_cache = _GLOBAL_TYPE_CACHE.setdefault(tb, {})
+        # Leaf and literal types, built once per parser and reused
+        self._leaf_cache: Dict[str, FieldType] = {}
+        self._literal_cache: Dict[str, FieldType] = {}
+        # Types already made optional by an anyOf null branch, keyed by id()
+        # (values keep the ids from being reused)
+        self._optional_types: Dict[int, FieldType] = {}
+        # Generic-dict field names already warned about, so each is reported once per schema
+        self._warned_generic: set = set()
+
+    def _parse_object(self, json_schema: Dict[str, Any]) -> ParseStep:
         name = json_schema.get("title")
         if name is None:
             raise ValueError("Title is required in JSON schema for object type")
 
-        required_fields = json_schema.get("required", [])
-        assert isinstance(required_fields, list)
+        required_fields = frozenset(json_schema.get("required") or ())
 
         new_cls = self.tb.add_class(name)
         if properties := json_schema.get("properties"):
-            assert isinstance(properties, dict)
-            for field_name, field_schema in properties.items():
-                assert isinstance(field_schema, dict)
-                default_value = field_schema.get("default")
-                # Handle case when properties are not defined, BAML expects `map<string, string>`
-                if field_schema.get("properties") is None and field_schema.get("type") == "object":
+            self._open_classes[id(json_schema)] = new_cls
+            try:
+                yield from self._add_properties(new_cls, properties, required_fields)
+            finally:
+                del self._open_classes[id(json_schema)]
+        return new_cls.type()
+
+    def _add_properties(self, cls, properties: Dict[str, Any], required: frozenset) -> Generator[Dict[str, Any], FieldType, None]:
+        """Add each JSON schema property to cls, resolving field types through the driver."""
+        _get = dict.get
+        for field_name, field_schema in properties.items():
+            if __debug__ and not isinstance(field_schema, dict):
+                raise TypeError(f"Schema for field '{field_name}' must be a dict, got {type(field_schema).__name__}")
+            default_value = _get(field_schema, "default")
+            description = _get(field_schema, "description")
+            # Handle case when properties are not defined, BAML expects `map<string, string>`
+            if _get(field_schema, "properties") is None and _get(field_schema, "type") == "object":
+                # Check the filters first so suppressed warnings skip building the message
+                if field_name not in self._warned_generic and not _user_warnings_ignored():
+                    self._warned_generic.add(field_name)
                     warnings.warn(
                         f"Field '{field_name}' uses generic dict type which defaults to Dict[str, str]. "
                         "If a more specific type is needed, please provide a specific Pydantic model instead.",
                         UserWarning,
                         stacklevel=2
                     )
-                    field_type = self.tb.map(self.tb.string(), self.tb.string())
-                else:
-                    field_type = self.parse(field_schema)
-                if field_name not in required_fields:
-                    if default_value is None:
-                        field_type = field_type.optional()
-                property_ = new_cls.add_property(field_name, field_type)
-                if description := field_schema.get("description"):
-                    assert isinstance(description, str)
-                    if default_value is not None:
-                        description = (
-                            description.strip() + "\n" + f"Default: {default_value}"
-                        )
-                        description = description.strip()
-                    if len(description) > 0:
-                        property_.description(description)
-        return new_cls.type()
+                field_type = self._str_str_map()
+            else:
+                field_type = yield field_schema
+            if field_name not in required:
+                if default_value is None and id(field_type) not in self._optional_types:
+                    field_type = field_type.optional()
+            if description:
+                if default_value is not None:
+                    description = f"{description.strip()}\nDefault: {default_value}".strip()
+            property_ = cls.add_property(field_name, field_type)
+            if description:
+                property_.description(description)
 
     def _parse_string(self, json_schema: Dict[str, Any]) -> FieldType:
-        assert json_schema["type"] == "string"
         title = json_schema.get("title")
 
         if enum := json_schema.get("enum"):
-            assert isinstance(enum, list)
             if title is None:
                 # Treat as a union of literals
-                return self.tb.union([self.tb.literal_string(value) for value in enum])
+                return self.tb.union([self._literal_string(value) for value in enum])
             new_enum = self.tb.add_enum(title)
             for value in enum:
                 new_enum.add_value(value)
             return new_enum.type()
-        return self.tb.string()
-
-    def _load_ref(self, ref: str) -> FieldType:
-        assert ref.startswith("#/"), f"Only local references are supported: {ref}"
-        _, left, right = ref.split("/", 2)
-
-        if ref not in self._ref_cache:
-            if refs := self.schema.get(left):
-                assert isinstance(refs, dict)
-                if right not in refs:
-                    raise ValueError(f"Reference {ref} not found in schema")
-                self._ref_cache[ref] = self.parse(refs[right])
+        return self._leaf("string")
+
+    def _parse_number(self, json_schema: Dict[str, Any]) -> FieldType:
+        return self._leaf("float")
+
+    def _parse_integer(self, json_schema: Dict[str, Any]) -> FieldType:
+        return self._leaf("int")
+
+    def _parse_boolean(self, json_schema: Dict[str, Any]) -> FieldType:
+        return self._leaf("bool")
+
+    def _parse_null(self, json_schema: Dict[str, Any]) -> FieldType:
+        return self._leaf("null")
+
+    def _parse_array(self, json_schema: Dict[str, Any]) -> ParseStep:
+        item_type = yield json_schema["items"]
+        return item_type.list()
+
+    def _parse_union(self, sub_schemas: List[Dict[str, Any]]) -> ParseStep:
+        # Pydantic emits Optional[X] as anyOf [X, {"type": "null"}], build X.optional()
+        # instead of a union with an explicit null member
+        non_null = [s for s in sub_schemas if s.get("type") != "null"]
+        is_optional = len(non_null) == len(sub_schemas) - 1 and len(non_null) > 0
+        if is_optional:
+            sub_schemas = non_null
+            if len(sub_schemas) == 1:
+                field_type = yield sub_schemas[0]
+                return self._mark_optional(field_type.optional())
+
+        # Resolve every member first, then build the union once
+        members: List[Optional[FieldType]] = [None] * len(sub_schemas)
+        for i, sub_schema in enumerate(sub_schemas):
+            members[i] = yield sub_schema
+        union = self.tb.union(members)
+        return self._mark_optional(union.optional()) if is_optional else union
+
+    def _mark_optional(self, field_type: FieldType) -> FieldType:
+        self._optional_types[id(field_type)] = field_type
+        return field_type
+
+    def _ref_target(self, ref: str) -> Dict[str, Any]:
+        if ref[:2] != "#/":
+            raise ValueError(f"Only local references are supported: {ref}")
+        left, _, right = ref[2:].partition("/")
+        refs = self.schema.get(left)
+        if not refs or right not in refs:
+            raise ValueError(f"Reference {ref} not found in schema")
+        return refs[right]
+
+    def _load_ref(self, ref: str) -> ParseStep:
+        if (cached := self._ref_cache.get(ref)) is not None:
+            if cached is _PARSING:
+                # Self-referencing model (e.g. a tree node): BAML classes may be
+                # recursive, so refer to the class whose properties are being added
+                open_cls = self._open_classes.get(id(self._ref_target(ref)))
+                if open_cls is None:
+                    raise ValueError(f"Cyclic $ref: {ref}")
+                return open_cls.type()
+            return cached
+
+        target = self._ref_target(ref)
+        # Mark the ref as in progress so a self-referencing target is detected
+        self._ref_cache[ref] = _PARSING
+        try:
+            self._ref_cache[ref] = yield target
+        finally:
+            if self._ref_cache.get(ref) is _PARSING:
+                del self._ref_cache[ref]
         return self._ref_cache[ref]
 
-    def _parse_function(self, json_schema: Dict[str, Any]) -> FieldType:
+    def _parse_function(self, json_schema: Dict[str, Any]) -> ParseStep:
         """Parse OpenAI function tool format into BAML tool class."""
-        assert json_schema["type"] == "function"
         function_data = json_schema["function"]
         
-        tool_name = function_data["name"]
-        class_name = f"{tool_name}"
+        # The tool name doubles as class name, literal value and cache key
+        class_name = tool_name = sys.intern(function_data["name"])
         
         # Check if class already exists in cache
         if class_name in self._class_cache:
@@ -93,11 +242,11 @@ class SchemaAdder:
         
         # Create the tool class
         new_cls = self.tb.add_class(class_name)
-        action_input_cls = self.tb.add_class(f"{class_name}_arguments")
+        action_input_cls = self.tb.add_class(sys.intern(class_name + "_arguments"))
         # Add action property with <tool_name> value
         action_property = new_cls.add_property(
             "name", 
-            self.tb.literal_string(f"{tool_name}")
+            self._literal_string(tool_name)
         )
         action_input_property = new_cls.add_property(
             "arguments",
@@ -111,84 +260,174 @@ class SchemaAdder:
         # Parse function parameters as class properties
         if parameters := function_data.get("parameters"):
             if parameters.get("type") == "object":
-                required_fields = parameters.get("required", [])
-                assert isinstance(required_fields, list)
-                
+                required_fields = frozenset(parameters.get("required") or ())
+
                 if properties := parameters.get("properties"):
-                    assert isinstance(properties, dict)
-                    for field_name, field_schema in properties.items():
-                        assert isinstance(field_schema, dict)
-                        default_value = field_schema.get("default")
-                        
-                        # Handle case when properties are not defined, BAML expects `map<string, string>`
-                        if field_schema.get("properties") is None and field_schema.get("type") == "object":
-                            warnings.warn(
-                                f"Field '{field_name}' uses generic dict type which defaults to Dict[str, str]. "
-                                "If a more specific type is needed, please provide a specific Pydantic model instead.",
-                                UserWarning,
-                                stacklevel=2
-                            )
-                            field_type = self.tb.map(self.tb.string(), self.tb.string())
-                        else:
-                            field_type = self.parse(field_schema)
-                        
-                        if field_name not in required_fields:
-                            if default_value is None:
-                                field_type = field_type.optional()
-                        
-                        property_ = action_input_cls.add_property(field_name, field_type)
-                        if field_description := field_schema.get("description"):
-                            assert isinstance(field_description, str)
-                            if default_value is not None:
-                                field_description = (
-                                    field_description.strip() + "\n" + f"Default: {default_value}"
-                                )
-                                field_description = field_description.strip()
-                            if len(field_description) > 0:
-                                property_.description(field_description)
-        
+                    yield from self._add_properties(action_input_cls, properties, required_fields)
+
         # Cache the created class
         self._class_cache[class_name] = new_cls.type()
         return self._class_cache[class_name]
 
-    def parse(self, json_schema: Dict[str, Any]) -> FieldType:
+    # JSON schema "type" -> unbound parser function, called as handler(self, schema)
+    _TYPE_DISPATCH: Dict[str, Callable[["SchemaAdder", Dict[str, Any]], Any]] = {
+        "string": _parse_string,
+        "number": _parse_number,
+        "integer": _parse_integer,
+        "object": _parse_object,
+        "array": _parse_array,
+        "boolean": _parse_boolean,
+        "null": _parse_null,
+        "function": _parse_function,
+    }
+
+    def _parse_node(self, json_schema: Dict[str, Any]) -> ParseStep:
         if any_of := json_schema.get("anyOf"):
-            assert isinstance(any_of, list)
-            return self.tb.union([self.parse(sub_schema) for sub_schema in any_of])
+            return (yield from self._parse_union(any_of))
 
-        if additional_properties := json_schema.get("additionalProperties"):
-            assert isinstance(additional_properties, dict)
+        additional_properties = json_schema.get("additionalProperties")
+        # additionalProperties may also be a plain boolean
+        if isinstance(additional_properties, dict):
             if any_of_additional_props := additional_properties.get("anyOf"):
-                assert isinstance(any_of_additional_props, list)
-                return self.tb.map(self.tb.string(), self.tb.union([self.parse(sub_schema) for sub_schema in any_of_additional_props]))
+                value_type = yield from self._parse_union(any_of_additional_props)
+                return self.tb.map(self._leaf("string"), value_type)
 
         if ref := json_schema.get("$ref"):
-            assert isinstance(ref, str)
-            return self._load_ref(ref)
+            return (yield from self._load_ref(ref))
 
         type_ = json_schema.get("type")
         if type_ is None:
             warnings.warn("Empty type field in JSON schema, defaulting to string", UserWarning, stacklevel=2)
-            return self.tb.string()
+            return self._leaf("string")
         
-        parse_type = {
-            "string": lambda: self._parse_string(json_schema),
-            "number": lambda: self.tb.float(),
-            "integer": lambda: self.tb.int(),
-            "object": lambda: self._parse_object(json_schema),
-            "array": lambda: self.parse(json_schema["items"]).list(),
-            "boolean": lambda: self.tb.bool(),
-            "null": lambda: self.tb.null(),
-            "function": lambda: self._parse_function(json_schema)
-        }
-
-        if type_ not in parse_type:
+        handler = self._TYPE_DISPATCH.get(type_)
+        if handler is None:
             raise ValueError(f"Unsupported type: {type_}")
 
-        field_type = parse_type[type_]()
+        field_type = handler(self, json_schema)
+        if isinstance(field_type, GeneratorType):
+            # Composite type, resolve its children through the driver
+            field_type = yield from field_type
 
         return field_type
 
+    def parse(self, json_schema: Dict[str, Any]) -> FieldType:
+        """
+        Parse a JSON schema into a BAML FieldType.
+
+        Walks the schema with an explicit stack of parser steps instead of
+        Python recursion, so deeply nested schemas cannot hit RecursionError.
+        """
+        cached = self._cached_type(json_schema)
+        if cached is not None:
+            return cached
+
+        stack: List[Tuple[Dict[str, Any], ParseStep]] = [
+            (json_schema, self._parse_node(json_schema))
+        ]
+        result: Optional[FieldType] = None
+        try:
+            while stack:
+                schema, step = stack[-1]
+                try:
+                    # result is None when starting a step, else the child's FieldType
+                    child_schema = step.send(result)
+                except StopIteration as done:
+                    stack.pop()
+                    result = done.value
+                    self._remember_type(schema, result)
+                    continue
+                result = self._parse_scalar(child_schema)
+                if result is None:
+                    result = self._cached_type(child_schema)
+                if result is None:
+                    stack.append((child_schema, self._parse_node(child_schema)))
+        finally:
+            # On error, unwind the pending steps innermost first so they can clean up
+            while stack:
+                stack.pop()[1].close()
+        return result
+
+    def _leaf(self, kind: str) -> FieldType:
+        """tb.<kind>() for a leaf type ("string", "int", "float", "bool", "null"), built once."""
+        leaf = self._leaf_cache.get(kind)
+        if leaf is None:
+            leaf = self._leaf_cache[kind] = getattr(self.tb, kind)()
+        return leaf
+
+    def _literal_string(self, value: str) -> FieldType:
+        literal = self._literal_cache.get(value)
+        if literal is None:
+            literal = self._literal_cache[value] = self.tb.literal_string(value)
+        return literal
+
+    def _str_str_map(self) -> FieldType:
+        """map<string, string>, the BAML stand-in for untyped dict fields."""
+        map_type = self._leaf_cache.get("map")
+        if map_type is None:
+            # Key and value must be distinct objects, tb.map() deadlocks when
+            # handed the same FieldType twice
+            map_type = self._leaf_cache["map"] = self.tb.map(self._leaf("string"), self.tb.string())
+        return map_type
+
+    def _parse_scalar(self, json_schema: Dict[str, Any]) -> Optional[FieldType]:
+        """Build plain leaf types directly, without creating a parser step."""
+        if "anyOf" in json_schema or "$ref" in json_schema:
+            return None
+        type_ = json_schema.get("type")
+        if type_ == "string":
+            return None if "enum" in json_schema else self._leaf("string")
+        if type_ == "integer":
+            return self._leaf("int")
+        if type_ == "number":
+            return self._leaf("float")
+        if type_ == "boolean":
+            return self._leaf("bool")
+        if type_ == "null":
+            return self._leaf("null")
+        return None
+
+    def _cached_type(self, json_schema: Dict[str, Any]) -> Optional[FieldType]:
+        """Look up a sub-schema by identity, then named types by structure."""
+        cached = self._parse_cache.get(id(json_schema))
+        if cached is not None or not _is_named_type(json_schema):
+            return cached
+        digest = self._digests.get(id(json_schema))
+        if digest is None and id(json_schema) not in self._digests:
+            digest = self._digests[id(json_schema)] = _schema_digest(json_schema)
+        if digest is None:
+            return None
+        cached = self._shared_cache.get(digest)
+        if cached is not None:
+            self._parse_cache[id(json_schema)] = cached
+        return cached
+
+    def _remember_type(self, json_schema: Dict[str, Any], field_type: FieldType) -> None:
+        self._parse_cache[id(json_schema)] = field_type
+        if digest := self._digests.get(id(json_schema)):
+            self._shared_cache[digest] = field_type
+
+
+# OpenAI tool schemas keyed by id() of the tool. The weakref drops the entry
+# when the tool is garbage collected, so a recycled id can never hit.
+_TOOL_SCHEMA_CACHE: Dict[int, Tuple[weakref.ref, Dict[str, Any]]] = {}
+
+
+def _openai_tool_schema(tool: Union[Type[BaseModel], Callable]) -> Dict[str, Any]:
+    """convert_to_openai_tool(), computed once per tool object."""
+    key = id(tool)
+    entry = _TOOL_SCHEMA_CACHE.get(key)
+    if entry is not None and entry[0]() is tool:
+        return entry[1]
+    tool_schema = convert_to_openai_tool(tool)
+    try:
+        ref = weakref.ref(tool, lambda _, key=key: _TOOL_SCHEMA_CACHE.pop(key, None))
+    except TypeError:
+        # Not weak-referenceable (e.g. a plain dict schema), don't cache
+        return tool_schema
+    _TOOL_SCHEMA_CACHE[key] = (ref, tool_schema)
+    return tool_schema
+
 
 def parse_json_schema(json_schema: Dict[str, Any], tb: TypeBuilder) -> FieldType:
     parser = SchemaAdder(tb, json_schema)
@@ -227,7 +466,7 @@ def convert_to_baml_tool(
     baml_types = []
     for tool in tools:
         # Convert tool to OpenAI function schema
-        tool_schema = convert_to_openai_tool(tool)
+        tool_schema = _openai_tool_schema(tool)
 
         # Parse the schema to BAML type
         tool_baml_type = parse_json_schema(tool_schema, tb)
@@ -247,6 +486,58 @@ def convert_to_baml_tool(
 
     return tb
 
+# Ready-made TypeBuilders for fixed tool sets, most recently used last
+_BUILDER_CACHE_MAXSIZE = 64
+_BUILDER_CACHE: "OrderedDict[tuple, Tuple[tuple, TypeBuilder]]" = OrderedDict()
+_builder_cache_lock = threading.Lock()
+
+
+def build_baml_tool_builder_once(
+    tools: List[Union[Type[BaseModel], Callable]] = None,
+    property_name: str = 'selected_tool',
+    is_multiple_tools: bool = False
+) -> Optional[TypeBuilder]:
+    """
+    Like convert_to_baml_tool(), but builds the TypeBuilder only once per tool set.
+
+    Agents usually call the model with the same bound tools on every turn, so
+    the TypeBuilder is cached (LRU, 64 entries) by the identity of the tools
+    and the conversion options. The returned TypeBuilder is shared between
+    callers and must not be modified.
+
+    Args:
+        tools: List of tools (Pydantic BaseModel classes and/or @tool decorated functions)
+        property_name: Name of the Dynamic schema property to add
+        is_multiple_tools: If True, creates a list of union for multiple tool selection
+
+    Returns:
+        Shared TypeBuilder instance with the property added to DynamicSchema
+    """
+    if not tools:
+        return None
+
+    tools = tuple(tools)
+    key = (tuple(id(tool) for tool in tools), property_name, is_multiple_tools)
+    with _builder_cache_lock:
+        entry = _BUILDER_CACHE.get(key)
+        # Compare identities too, the ids may belong to recycled objects
+        if entry is not None and all(a is b for a, b in zip(entry[0], tools)):
+            _BUILDER_CACHE.move_to_end(key)
+            return entry[1]
+
+    tb = convert_to_baml_tool(
+        tools=list(tools),
+        property_name=property_name,
+        is_multiple_tools=is_multiple_tools,
+    )
+    with _builder_cache_lock:
+        # Holding the tools keeps their ids from being reused while cached
+        _BUILDER_CACHE[key] = (tools, tb)
+        _BUILDER_CACHE.move_to_end(key)
+        if len(_BUILDER_CACHE) > _BUILDER_CACHE_MAXSIZE:
+            _BUILDER_CACHE.popitem(last=False)
+    return tb
+
 # test
 if __name__ == "__main__":
     import os
@@ -1,37 +1,49 @@
 import json
+import re
 from typing import Optional
+
+# Quoted object key at the start of a pretty-printed JSON line
+_UNQUOTE_KEY_RE = re.compile(r'^(\s*)"([^"\\]+)":', re.MULTILINE)
+# Key that json.dumps() writes out unchanged, so it can be emitted bare
+_PLAIN_KEY_RE = re.compile(r'[^"\\\x00-\x1f]+')
+
+
 def format_args_no_quote_keys(d: dict, indent: Optional[int] = 4) -> str:
     """Pretty JSON-like string with unquoted keys, indent=4"""
     if not d:
         return "{}"
+
+    # Fast path for flat {str: scalar} arguments, same output as the slow path
+    if isinstance(indent, int) and all(
+        isinstance(k, str) and _PLAIN_KEY_RE.fullmatch(k) and not isinstance(v, (dict, list, tuple))
+        for k, v in d.items()
+    ):
+        pad = " " * indent
+        return "{\n" + ",\n".join(
+            f"{pad}{k}: {json.dumps(v, ensure_ascii=False)}" for k, v in d.items()
+        ) + "\n}"
     
     json_str = json.dumps(d, indent=indent, ensure_ascii=False)
-    lines = []
-    for line in json_str.splitlines():
-        stripped = line.lstrip()
-        if stripped.startswith('"') and '":' in stripped:
-            sp = line[:len(line) - len(stripped)]
-            key, rest = stripped.split('":', 1)
-            lines.append(f"{sp}{key[1:]}:{rest}")
-        else:
-            lines.append(line)
-    return "\n".join(lines)
+    # Keys containing escaped characters are left quoted
+    return _UNQUOTE_KEY_RE.sub(r"\1\2:", json_str)
 
 
 # ────────────────────────────────────────────────
 # "Agent wants to ..." style templates
 # ────────────────────────────────────────────────
 
+_TEMPLATE = (
+    "Tool `{name}` was selected with arguments:\n"
+    "{args}"
+)
+
+
 def render_agent_wants_to(name: str, arguments: dict, indent: Optional[int]= 2) -> str:
     """
     """
-    TEMPLATES = (
-        "Tool `{name}` was selected with arguments:\n"
-        "{args}"
-    )
     args_pretty = format_args_no_quote_keys(arguments, indent=indent)
     
-    return TEMPLATES.format(
+    return _TEMPLATE.format(
         name=name,
         args=args_pretty
     )
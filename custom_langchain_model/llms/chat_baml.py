@@ -1,32 +1,44 @@
 import os
 
-from custom_langchain_model.helpers.render_agent_wants_to import (
-    format_args_no_quote_keys, render_agent_wants_to
-)
+import asyncio
+import copy
 import uuid
+import hashlib
+import inspect
 import json
 import logging
-from typing import Any, Dict, Iterator, List, Literal, Optional, Sequence, Union, Type, Callable
-from pydantic import Field  # Import Field for metadata
-
-from baml_py import ClientRegistry
+import secrets
+import threading
+from collections import OrderedDict
+import httpx
+from typing import Any, AsyncIterator, Collection, Dict, Iterator, List, Literal, Optional, Sequence, Tuple, Union, Type, Callable
+from pydantic import Field, PrivateAttr, field_validator  # Import Field for metadata
+
+from baml_py import AbortController, ClientRegistry
+from baml_py import errors as baml_errors
 from custom_langchain_model.baml_client import (
     b as baml_root_client
 )
+from custom_langchain_model.baml_client.async_client import (
+    b as baml_async_root_client
+)
 
 from custom_langchain_model.baml_client.types import (
     BamlState,
     BaseMessage as BamlBaseMessage,
+    ContentBlock,
     DynamicSchema,
+    ToolCall,
 )
 
 from custom_langchain_model.baml_client.stream_types import DynamicSchema as DynamicSchemaChunk
 from custom_langchain_model.baml_client.type_builder import TypeBuilder
 from baml_py import baml_py
 
-from custom_langchain_model.helpers.parse_json_schema import convert_to_baml_tool
+from custom_langchain_model.helpers.messages import dumps_tool_args
+from custom_langchain_model.helpers.parse_json_schema import build_baml_tool_builder_once
 
-from custom_langchain_model.llms.types import Provider, Role, BamlAbortError
+from custom_langchain_model.llms.types import Provider, Role
 
 from langchain_core.language_models import BaseChatModel
 from langchain_openai.chat_models import ChatOpenAI
@@ -41,13 +53,146 @@ from langchain_core.messages import (
 )
 from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
 
-from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
 from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.runnables.config import get_config_list
 from langchain_core.tools import BaseTool
 from pydantic import BaseModel
 
 logger = logging.getLogger(__name__)
 
+_OPENAI_BASE_URL = "https://api.openai.com/v1"
+_BATCH_API_TIMEOUT = 60.0
+# Batch API statuses for jobs that have not finished yet
+_BATCH_PENDING_STATUSES = frozenset(("validating", "in_progress", "finalizing", "cancelling"))
+
+# Public attributes of the BAML client (functions, stream, request, parse, ...)
+# that ChatBaml.__getattr__ proxies
+_BAML_CLIENT_ATTRS = frozenset(name for name in dir(baml_root_client) if not name.startswith("_"))
+
+# Abort controllers of running _astream() calls by stream id, removed by the
+# stream when it ends (AbortController can't be weakly referenced)
+_active_streams: Dict[str, AbortController] = {}
+
+# Client registries with their sync/async BAML clients shared by all ChatBaml
+# instances, keyed by client config, most recently used last
+_CLIENT_CACHE_MAXSIZE = 32
+_CLIENT_CACHE: "OrderedDict[tuple, Tuple[ClientRegistry, Any, Any]]" = OrderedDict()
+_client_cache_lock = threading.Lock()
+
+# Guards the per-instance response caches of ChatBaml
+_response_cache_lock = threading.Lock()
+
+# LangChain message type -> BAML role. Subclasses (e.g. AIMessageChunk) are
+# resolved by _resolve_role() and added on first sight.
+_ROLE_MAP: Dict[type, str] = {
+    HumanMessage: "user",
+    AIMessage: "assistant",
+    SystemMessage: "system",
+    ToolMessage: "tool",
+}
+
+
+def _resolve_role(msg: BaseMessage) -> str:
+    for message_type, role in tuple(_ROLE_MAP.items()):
+        if isinstance(msg, message_type):
+            _ROLE_MAP[type(msg)] = role
+            return role
+    raise TypeError(
+        f"Unsupported message: {msg}. "
+    )
+
+def _message_key(msg: BaseMessage) -> tuple:
+    """
+    What the BAML conversion of msg was built from: the message with its content
+    and tool calls, by identity and length, so edits made in place since are noticed.
+    """
+    content = msg.content
+    tool_calls = getattr(msg, "tool_calls", None) or ()
+    return (msg, content, len(content), tool_calls, len(tool_calls))
+
+def _is_unchanged(key: tuple, msg: BaseMessage) -> bool:
+    """Whether msg is still the message _message_key() saw."""
+    content = msg.content
+    tool_calls = getattr(msg, "tool_calls", None) or ()
+    return (
+        key[0] is msg and key[1] is content and key[2] == len(content)
+        and key[3] is tool_calls and key[4] == len(tool_calls)
+    )
+
+def _tool_names_of(tools: Optional[Sequence[Any]]) -> Tuple[str, ...]:
+    """Names of tools, for validating the selected tool."""
+    return tuple(_tool_name(tool) for tool in tools or ())
+
+def _call_tool_names(kwargs: Dict[str, Any], tools: Optional[Sequence[Any]]) -> Tuple[str, ...]:
+    """
+    Tool names bound by bind_tools() together with the tools, or computed from
+    tools passed straight to invoke()/stream().
+
+    They travel on the binding rather than the instance: every binding wraps the
+    same ChatBaml, so names stored on it would belong to the last bind_tools() call.
+    """
+    return kwargs.get("_tool_names") or _tool_names_of(tools)
+
+def _tool_name(tool: Any) -> str:
+    """
+    Name of a bound tool: a LangChain tool, a Pydantic model or function, or an
+    OpenAI-style dict ({"type": "function", "function": {"name": ...}} or {"name": ...}).
+
+    Raises:
+        ValueError: If a dict tool has no name
+    """
+    if isinstance(tool, dict):
+        function = tool.get("function")
+        name = (function if isinstance(function, dict) else tool).get("name")
+        if not isinstance(name, str):
+            raise ValueError(f"Tool dict has no name: {tool}")
+        return name
+    return tool.name if hasattr(tool, 'name') else tool.__name__
+
+def _new_tool_call_id() -> str:
+    # Tool call ids only need to be unique, not RFC 4122 UUIDs
+    return f"call_{secrets.token_hex(8)}"
+
+# Meta-tool offered with enable_batch_tool: lets the model request several
+# independent tool calls in one response
+_BATCH_TOOL_NAME = "batch_tool"
+_BATCH_TOOL = {
+    "type": "function",
+    "function": {
+        "name": _BATCH_TOOL_NAME,
+        "description": (
+            "Call several independent tools at once. Use it instead of calling "
+            "the tools one by one when their inputs do not depend on each other."
+        ),
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "invocations": {
+                    "type": "array",
+                    "description": "The tool calls to run.",
+                    "items": {
+                        "title": "BatchToolInvocation",
+                        "type": "object",
+                        "properties": {
+                            "name": {
+                                "type": "string",
+                                "description": "Name of the tool to call.",
+                            },
+                            "arguments": {
+                                "type": "string",
+                                "description": "Arguments of the tool as a JSON object.",
+                            },
+                        },
+                        "required": ["name", "arguments"],
+                    },
+                },
+            },
+            "required": ["invocations"],
+        },
+    },
+}
+
 class ChatBaml(BaseChatModel):
     """
     A LangChain-compatible Chat Model that wraps BAML.
@@ -103,11 +248,153 @@ class ChatBaml(BaseChatModel):
         description="Dictionary for any extra parameters not explicitly defined in the class."
     )
 
+    server_side_tools: Dict[str, Union[BaseTool, Callable]] = Field(
+        default_factory=dict,
+        description=(
+            "Tools executed inside ChatBaml by name. When the model selects one, it is run and "
+            "its output fed straight back to the model instead of returning the tool call. "
+            "Only invoke()/ainvoke() run them; streaming returns the tool call as usual."
+        ),
+    )
+    max_tool_rounds: int = Field(
+        default=3,
+        description=(
+            "Maximum number of server-side tool executions per generate call. When it is "
+            "reached, the model is asked once more without the server-side tools."
+        ),
+    )
+    enable_batch_tool: bool = Field(
+        default=False,
+        description=(
+            "Offer the model a batch_tool to call several tools in one response. "
+            "Its invocations are returned as separate tool calls."
+        ),
+    )
+
+    enable_response_cache: bool = Field(
+        default=False,
+        description=(
+            "Reuse the BAML response for identical requests. Only applies when "
+            "temperature is 0, where the output is deterministic, and never "
+            "when server_side_tools are set, since a hit would skip their side effects."
+        ),
+    )
+    response_cache_size: int = Field(
+        default=512,
+        description="Maximum number of responses kept by the response cache (LRU).",
+    )
+
+    max_concurrency: Optional[int] = Field(
+        default=10,
+        description=(
+            "Maximum number of concurrent BAML requests in abatch() when the RunnableConfig "
+            "does not set max_concurrency. None means no limit."
+        ),
+    )
+
+    # (config key, client registry, sync BAML client, async BAML client) for the last config used
+    _client_cache: Optional[Tuple[tuple, ClientRegistry, Any, Any]] = PrivateAttr(default=None)
+
+    # (TypeBuilder, {"tb": TypeBuilder}) passed to ChooseTool for the last tool set
+    _baml_options_cache: Optional[Tuple[TypeBuilder, Dict[str, Any]]] = PrivateAttr(default=None)
+
+    # (_message_key() of each LangChain message, their BAML messages) of the last
+    # conversion, reused for the common prefix of the next one. Holds the last
+    # conversation, images included, until the next conversion replaces it.
+    _baml_messages_cache: Optional[Tuple[tuple, tuple]] = PrivateAttr(default=None)
+
+    # Request digest -> (TypeBuilder, BAML result), most recently used last
+    _response_cache: "OrderedDict[bytes, Tuple[Optional[TypeBuilder], Any]]" = PrivateAttr(
+        default_factory=OrderedDict
+    )
+
     @property
     def _llm_type(self) -> str:
         return "baml-chat-model"
 
+    def _client_config_key(self) -> tuple:
+        """Everything the client registry is built from, compared to detect config changes."""
+        return (
+            self.model,
+            self.temperature,
+            self.provider,
+            self.api_key or os.getenv("OPENAI_API_KEY"),
+            self.base_url,
+            self.max_tokens,
+            self.default_role,
+            tuple(self.allowed_roles or ()),
+            tuple(sorted(self.additional_options.items())),
+        )
+
+    def _get_cached_client(self) -> Tuple[ClientRegistry, Any, Any]:
+        """
+        Returns the client registry with the sync and async BAML clients configured
+        from it, rebuilding them only when a field they depend on has changed since
+        the last call.
+
+        Clients are also shared between instances through a process-wide LRU, so
+        instances created per request, or switched between a few configurations,
+        reuse a registry built for the same configuration.
+        """
+        key = self._client_config_key()
+        cached = self._client_cache
+        if cached is not None and cached[0] == key:
+            return cached[1], cached[2], cached[3]
+
+        try:
+            hash(key)
+        except TypeError:
+            # Unhashable additional_options values, keep the client to this instance
+            shared = False
+        else:
+            shared = True
+            with _client_cache_lock:
+                clients = _CLIENT_CACHE.get(key)
+                if clients is not None:
+                    _CLIENT_CACHE.move_to_end(key)
+            if clients is not None:
+                self._client_cache = (key, *clients)
+                return clients
+
+        cr = self._build_client_registry()
+        client = baml_root_client.with_options(client_registry=cr)
+        async_client = baml_async_root_client.with_options(client_registry=cr)
+        self._client_cache = (key, cr, client, async_client)
+        if shared:
+            with _client_cache_lock:
+                _CLIENT_CACHE[key] = (cr, client, async_client)
+                _CLIENT_CACHE.move_to_end(key)
+                if len(_CLIENT_CACHE) > _CLIENT_CACHE_MAXSIZE:
+                    _CLIENT_CACHE.popitem(last=False)
+        return cr, client, async_client
+
     def _get_client_registry(self) -> ClientRegistry:
+        """
+        Returns the BAML ClientRegistry for the current ChatBaml configuration.
+
+        The registry is cached and only rebuilt when the configuration changes.
+
+        Returns:
+            ClientRegistry: A configured BAML client registry ready for use
+
+        Raises:
+            ValueError: If the provider is not 'openai-generic' or if no API key is provided
+        """
+        return self._get_cached_client()[0]
+
+    @field_validator("provider")
+    @classmethod
+    def _check_provider(cls, provider: Provider) -> Provider:
+        """Rejects unsupported providers when ChatBaml is created rather than on first call."""
+        if provider != "openai-generic":
+            raise ValueError(
+                f"ChatBaml currently only supports provider='openai-generic'. "
+                f"Received: provider='{provider}'. "
+                "Use a different wrapper class if you need other providers."
+            )
+        return provider
+
+    def _build_client_registry(self) -> ClientRegistry:
         """
         Creates and configures a BAML ClientRegistry instance for the current ChatBaml configuration.
 
@@ -122,13 +409,9 @@ class ChatBaml(BaseChatModel):
             ValueError: If the provider is not 'openai-generic' or if no API key is provided
         """
         # https://docs.boundaryml.com/ref/baml_client/client-registry
-        
-        if self.provider != "openai-generic":
-            raise ValueError(
-                f"ChatBaml currently only supports provider='openai-generic'. "
-                f"Received: provider='{self.provider}'. "
-                "Use a different wrapper class if you need other providers."
-            )
+
+        # Validated at construction; re-checked in case the field was reassigned
+        self._check_provider(self.provider)
 
         cr = ClientRegistry()
 
@@ -181,6 +464,11 @@ class ChatBaml(BaseChatModel):
         - SystemMessage → "system"
         - ToolMessage → "tool"
 
+        Messages already converted by the previous call (same objects, in the same
+        order, with the same content and tool calls) are reused, so a growing
+        conversation only converts its new tail. The instance keeps the last
+        conversation and its BAML messages, images included, until the next call.
+
         Args:
             messages: List of LangChain BaseMessage objects to convert
 
@@ -191,42 +479,60 @@ class ChatBaml(BaseChatModel):
             TypeError: If an unsupported message type is encountered
         """
         from custom_langchain_model.helpers.messages import convert_to_baml_content_block
-        baml_messages = []
-        for msg in messages:
-            content_block = convert_to_baml_content_block(msg.content_blocks)
-            match msg:
-                case HumanMessage():
-                    baml_msg = BamlBaseMessage(
-                        role="user",
-                        content_block=content_block
-                    )
-                    baml_messages.append(baml_msg)
-                # below has no image support for now
-                case AIMessage():
-                    baml_msg = BamlBaseMessage(
-                        role="assistant",
-                        content_block=content_block
-                    )
-                    baml_messages.append(baml_msg)
-                case SystemMessage():
-                    baml_msg = BamlBaseMessage(
-                        role="system",
-                        content_block=content_block
-                    )
-                    baml_messages.append(baml_msg)
-                case ToolMessage():
-                    baml_msg = BamlBaseMessage(
-                        role="tool",
-                        content_block=content_block
-                    )
-                    baml_messages.append(baml_msg)
-                case _:
-                    raise TypeError(
-                        f"Unsupported message: {msg}. "
-                    )
+        start, baml_messages = self._converted_prefix(messages)
+        for i in range(start, len(messages)):
+            msg = messages[i]
+            role = _ROLE_MAP.get(type(msg)) or _resolve_role(msg)
+            # role comes from _ROLE_MAP and the content block is built by our
+            # converter, so pydantic validation would only re-check them
+            baml_messages[i] = BamlBaseMessage.model_construct(
+                role=role,
+                content_block=convert_to_baml_content_block(msg.content_blocks)
+            )
 
+        self._baml_messages_cache = (tuple(map(_message_key, messages)), tuple(baml_messages))
         return baml_messages
 
+    async def _aconvert_to_baml_messages(self, messages: List[BaseMessage]) -> List[BamlBaseMessage]:
+        """
+        Async counterpart of _convert_to_baml_messages; image URLs are fetched on the
+        event loop instead of blocking it.
+        """
+        from custom_langchain_model.helpers.messages import aconvert_to_baml_content_block
+        start, baml_messages = self._converted_prefix(messages)
+        for i in range(start, len(messages)):
+            msg = messages[i]
+            role = _ROLE_MAP.get(type(msg)) or _resolve_role(msg)
+            # role comes from _ROLE_MAP and the content block is built by our
+            # converter, so pydantic validation would only re-check them
+            baml_messages[i] = BamlBaseMessage.model_construct(
+                role=role,
+                content_block=await aconvert_to_baml_content_block(msg.content_blocks)
+            )
+
+        self._baml_messages_cache = (tuple(map(_message_key, messages)), tuple(baml_messages))
+        return baml_messages
+
+    def _converted_prefix(self, messages: List[BaseMessage]) -> Tuple[int, List[Optional[BamlBaseMessage]]]:
+        """
+        Returns how many leading messages the previous conversion already covered, and
+        a list of len(messages) holding their BAML messages followed by None slots.
+        """
+        cached = self._baml_messages_cache
+        start = 0
+        if cached is not None:
+            prev_keys, prev_baml = cached
+            limit = min(len(prev_keys), len(messages))
+            # Identity, not equality: the cache holds the objects, so ids can't be recycled.
+            # Content replaced or resized in place (e.g. middleware trimming a ToolMessage)
+            # makes the message, and everything after it, convert again
+            while start < limit and _is_unchanged(prev_keys[start], messages[start]):
+                start += 1
+        baml_messages: List[Optional[BamlBaseMessage]] = [None] * len(messages)
+        if start:
+            baml_messages[:start] = prev_baml[:start]
+        return start, baml_messages
+
     def _prepare_tb(self,
         tools: Optional[List[dict]] = None,
         tool_choice: Optional[Union[str, dict]] = None,
@@ -235,6 +541,7 @@ class ChatBaml(BaseChatModel):
         Prepares a BAML TypeBuilder for tool execution.
 
         This method converts LangChain tools to BAML format using the convert_to_baml_tool helper.
+        The TypeBuilder is cached per tool set, so bound tools are only converted once.
         It includes the special "ReplyToUser" tool that routes tool outputs back into the chat
         as assistant messages. The method currently only supports single tool execution.
 
@@ -255,18 +562,33 @@ class ChatBaml(BaseChatModel):
         if not tools:
             return None
 
+        if self.enable_batch_tool:
+            tools = [*tools, _BATCH_TOOL]
+
         try:
-            tb = convert_to_baml_tool(
-                tools=tools or [],
+            tb = build_baml_tool_builder_once(
+                tools=tools,
                 is_multiple_tools=False, # single / multiple tools
                 property_name=self.property_name,
             )
-            logger.debug(f"Successfully converted {len(tools)} tools to BAML format")
+            logger.debug("Successfully converted %d tools to BAML format", len(tools))
             return tb
         except Exception as e:
             logger.error(f"Failed to convert tools: {e}")
             raise ValueError(f"Tool conversion failed: {e}")
 
+    def _baml_options(self, tb: TypeBuilder) -> Dict[str, Any]:
+        """
+        BAML call options for tb. The TypeBuilder is cached per tool set, so the
+        options dict is built once per TypeBuilder and reused; it must not be modified.
+        """
+        cached = self._baml_options_cache
+        if cached is not None and cached[0] is tb:
+            return cached[1]
+        options = {"tb": tb}
+        self._baml_options_cache = (tb, options)
+        return options
+
     def _stream(
         self,
         messages: List[BaseMessage],
@@ -292,7 +614,6 @@ class ChatBaml(BaseChatModel):
 
         Raises:
             NotImplementedError: If context or stop handling is requested (not yet implemented)
-            BamlAbortError: If the BAML stream is aborted
         """
         context = kwargs.get("context")
         if context:
@@ -304,8 +625,8 @@ class ChatBaml(BaseChatModel):
 
         # Convert LangChain messages to BAML format
         baml_messages = self._convert_to_baml_messages(messages)
-        # Create BamlState with converted messages
-        baml_state = BamlState(messages=baml_messages)
+        # Create BamlState with converted messages, already valid so skip validation
+        baml_state = BamlState.model_construct(messages=baml_messages)
 
         # Prepare type builder with dynamic schema for tools
         tb = self._prepare_tb(
@@ -316,10 +637,8 @@ class ChatBaml(BaseChatModel):
             if tb is not None and tools:
                 logger.debug("Starting BAML ChooseTool streaming with tools...")
                 stream = self.b.stream.ChooseTool(
-                    baml_state, 
-                    {
-                        "tb": tb
-                    }
+                    baml_state,
+                    self._baml_options(tb)
                 )
             else:
                 logger.debug("Starting BAML Chat streaming without tools...")
@@ -327,6 +646,7 @@ class ChatBaml(BaseChatModel):
 
             prev_content: Optional[str] = None
             ai_message: Optional[AIMessageChunk] = None
+            tool_call_id: Optional[str] = None
             for partial in stream:
                 partial_delta = self._extract_partial_delta(
                     partial=partial,
@@ -334,10 +654,15 @@ class ChatBaml(BaseChatModel):
                 )
                 # tool call detected, yield full tool call at end
                 if partial_delta["tool_name"]:
+                    # One id per tool call, picked when the call first shows up
+                    if tool_call_id is None:
+                        tool_call_id = _new_tool_call_id()
                     final = stream.get_final_response()
                     ai_message = self._convert_to_ai_message(
                         dynamic_schema=final,
-                        is_streaming=True
+                        is_streaming=True,
+                        tool_call_id=tool_call_id,
+                        tool_names=_call_tool_names(kwargs, tools),
                     )
                     generation_chunk = ChatGenerationChunk(message=ai_message)
                     yield generation_chunk
@@ -346,28 +671,142 @@ class ChatBaml(BaseChatModel):
                 # delta string for response content
                 delta = partial_delta["delta"]
                 if not delta:
-                    logger.debug("No new delta in this chunk, skipping...")
                     continue
-                if not ai_message: # first valid delta
-                    ai_message = AIMessageChunk(
-                        content=delta
-                    )
-                else:
-                    ai_message = AIMessageChunk(
-                        content=delta,
-                        id=ai_message.id,
-                    )
-                generation_chunk = ChatGenerationChunk(message=ai_message)
+                ai_message = self._text_chunk(delta, ai_message)
+                # text is normally filled in by a validator, that model_construct skips
+                generation_chunk = ChatGenerationChunk.model_construct(message=ai_message, text=delta)
                 yield generation_chunk
 
                 # update prev_content if delta is non-empty
                 if partial_delta.get("prev_content", None):
                     prev_content = partial_delta["prev_content"]
                 
-        except BamlAbortError:
-            yield "data: [CANCELLED]\n\n"
-        # finally:
-        #     active_streams.pop(stream_id, None)
+        except baml_errors.BamlAbortError:
+            # Aborted streams just end, the chunks yielded so far are the answer
+            return
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        """
+        Async counterpart of _stream() using the BAML async client.
+
+        Partials are awaited on the event loop, so many streams can run concurrently.
+        Pass stream_id=... to make the stream cancellable with ChatBaml.cancel_stream();
+        a cancelled stream aborts the BAML request and ends after the chunks yielded so far.
+
+        Raises:
+            NotImplementedError: If context or stop handling is requested (not yet implemented)
+            ValueError: If another running stream already uses stream_id
+        """
+        context = kwargs.get("context")
+        if context:
+            raise NotImplementedError("context handling not implemented yet; will be added later")
+        if stop:
+            raise NotImplementedError("stop handling not implemented yet; will be added later")
+
+        tools = kwargs.get('tools', [])
+        stream_id = kwargs.get("stream_id") or str(uuid.uuid4())
+        if stream_id in _active_streams:
+            raise ValueError(f"A stream with id {stream_id!r} is already running")
+        controller = AbortController()
+        _active_streams[stream_id] = controller
+
+        try:
+            baml_messages = await self._aconvert_to_baml_messages(messages)
+            baml_state = BamlState.model_construct(messages=baml_messages)
+            tb = self._prepare_tb(
+                tools=tools
+            )
+
+            if tb is not None and tools:
+                logger.debug("Starting BAML ChooseTool async streaming with tools...")
+                stream = self.ab.stream.ChooseTool(
+                    baml_state, {**self._baml_options(tb), "abort_controller": controller}
+                )
+            else:
+                logger.debug("Starting BAML Chat async streaming without tools...")
+                stream = self.ab.stream.Chat(baml_state, {"abort_controller": controller})
+
+            prev_content: Optional[str] = None
+            ai_message: Optional[AIMessageChunk] = None
+            tool_call_id: Optional[str] = None
+            async for partial in stream:
+                if controller.aborted:
+                    return
+                partial_delta = self._extract_partial_delta(
+                    partial=partial,
+                    prev_content=prev_content
+                )
+                # tool call detected, yield full tool call at end
+                if partial_delta["tool_name"]:
+                    if tool_call_id is None:
+                        tool_call_id = _new_tool_call_id()
+                    final = await stream.get_final_response()
+                    ai_message = self._convert_to_ai_message(
+                        dynamic_schema=final,
+                        is_streaming=True,
+                        tool_call_id=tool_call_id,
+                        tool_names=_call_tool_names(kwargs, tools),
+                    )
+                    yield ChatGenerationChunk(message=ai_message)
+                    break
+
+                delta = partial_delta["delta"]
+                if not delta:
+                    continue
+                ai_message = self._text_chunk(delta, ai_message)
+                yield ChatGenerationChunk.model_construct(message=ai_message, text=delta)
+
+                if partial_delta.get("prev_content", None):
+                    prev_content = partial_delta["prev_content"]
+
+        except baml_errors.BamlAbortError:
+            # Cancelled through cancel_stream(), end the stream without an error
+            return
+        finally:
+            # Only drop our own entry
+            if _active_streams.get(stream_id) is controller:
+                del _active_streams[stream_id]
+
+    @staticmethod
+    def cancel_stream(stream_id: str) -> bool:
+        """
+        Cancels a running _astream() started with stream_id=...
+
+        The BAML request is aborted and the stream ends after the chunks it already
+        yielded. Safe to call from another thread.
+
+        Returns:
+            bool: True if a running stream with that id was found
+        """
+        controller = _active_streams.get(stream_id)
+        if controller is None:
+            return False
+        controller.abort()
+        return True
+
+    @staticmethod
+    def _text_chunk(delta: str, previous: Optional[AIMessageChunk]) -> AIMessageChunk:
+        """AIMessageChunk for a streamed text delta, sharing the id of the first chunk."""
+        if previous is None: # first valid delta
+            return AIMessageChunk(
+                content=delta
+            )
+        # Plain text deltas need no validation, skip pydantic for every token
+        return AIMessageChunk.model_construct(
+            content=delta,
+            id=previous.id,
+            additional_kwargs={},
+            response_metadata={},
+            tool_calls=[],
+            invalid_tool_calls=[],
+            tool_call_chunks=[],
+        )
 
     # for streaming usage
     def _extract_partial_delta(
@@ -404,20 +843,22 @@ class ChatBaml(BaseChatModel):
         """
         # Handle string case
         if isinstance(partial, str):
-            logger.debug("Received string-type partial, handle string streaming separately")
             if not prev_content:
                 return {"tool_name": None, "delta": partial, "prev_content": partial}
+            # Partials are cumulative: the whole previous reply must be a prefix.
+            # startswith() checks it in place, without copying either string
+            prev_len = len(prev_content)
             if not partial.startswith(prev_content):
                 logger.debug(
-                    f"Content discontinuity detected in string partial:\n"
-                    f"  prev: {repr(prev_content[:50])}...\n"
-                    f"  curr: {repr(partial[:50])}..."
+                    "Content discontinuity detected in string partial:\n"
+                    "  prev: %r...\n"
+                    "  curr: %r...",
+                    prev_content[:50], partial[:50],
                 )
                 # override prev_content to avoid crash
                 return {"tool_name": None, "delta": partial, "prev_content": partial}
-            delta = partial[len(prev_content):]
-            prev_content += delta
-            return {"tool_name": None, "delta": delta, "prev_content": prev_content}
+            # The current partial already is the accumulated content, no need to rebuild it
+            return {"tool_name": None, "delta": partial[prev_len:], "prev_content": partial}
 
         EMPTY_DELTA: Dict[Optional[str], Union[str, Dict[str, Any]]] = {"tool_name": None, "delta": "", "prev_content": prev_content}
 
@@ -440,6 +881,8 @@ class ChatBaml(BaseChatModel):
         self,
         dynamic_schema: Union[DynamicSchema, DynamicSchemaChunk],
         is_streaming: bool = False,
+        tool_call_id: Optional[str] = None,
+        tool_names: Collection[str] = (),
     ) -> Union[AIMessage, AIMessageChunk]:
         """
         Converts BAML dynamic schema responses to LangChain AIMessage or AIMessageChunk.
@@ -451,6 +894,10 @@ class ChatBaml(BaseChatModel):
         Args:
             dynamic_schema: BAML DynamicSchema or DynamicSchemaChunk response
             is_streaming: Whether the response is part of a streaming operation
+            tool_call_id: Id for the tool call; streams pass the id they picked once so
+                every chunk of the same call carries it. A new id is generated if omitted.
+            tool_names: Names of the tools offered in this call; the selected tool is
+                validated against them in final responses. Empty skips the check.
 
         Returns:
             Union[AIMessage, AIMessageChunk]: Converted LangChain message object
@@ -460,25 +907,75 @@ class ChatBaml(BaseChatModel):
         """
         # Safe extraction – this is the most battle-tested pattern with BAML streaming
         tool_dict = getattr(dynamic_schema, self.property_name, None)
+        if tool_call_id is None:
+            tool_call_id = _new_tool_call_id()
         
+        is_batch_tool = self.enable_batch_tool and tool_dict["name"] == _BATCH_TOOL_NAME
         if is_streaming:
+            # Streams pass the complete final response, so batch_tool calls can be expanded too
+            if is_batch_tool:
+                return AIMessageChunk(
+                    content='',
+                    tool_calls=self._expand_batch_tool(tool_dict["arguments"], tool_names)
+                )
             return AIMessageChunk(
                 content='',
                 tool_calls=[{
                     "name": tool_dict["name"],
                     "args": tool_dict["arguments"],
-                    "id": str(uuid.uuid4())
+                    "id": tool_call_id
                 }]
             )
+        if is_batch_tool:
+            return AIMessage(
+                content='',
+                tool_calls=self._expand_batch_tool(tool_dict["arguments"], tool_names)
+            )
+        if tool_names and tool_dict["name"] not in tool_names:
+            raise ValueError(f"Unknown tool selected: {tool_dict['name']}")
         return AIMessage(
             content='',
             tool_calls=[{
                 "name": tool_dict["name"],
                 "args": tool_dict["arguments"],
-                "id": str(uuid.uuid4())
+                "id": tool_call_id
             }]
         )
 
+    def _expand_batch_tool(self, arguments: Dict[str, Any], tool_names: Collection[str] = ()) -> List[Dict[str, Any]]:
+        """
+        Turns the invocations of a batch_tool call into separate tool calls, so
+        LangChain's ToolNode runs them concurrently.
+
+        Raises:
+            ValueError: If an invocation names an unknown tool or has invalid arguments
+        """
+        invocations = arguments.get("invocations") if isinstance(arguments, dict) else None
+        if not isinstance(invocations, list):
+            raise ValueError(f"Invalid arguments for tool {_BATCH_TOOL_NAME}: {arguments!r}")
+        tool_calls = []
+        for invocation in invocations:
+            name = invocation.get("name") if isinstance(invocation, dict) else None
+            if not isinstance(name, str):
+                raise ValueError(f"Invalid invocation for tool {_BATCH_TOOL_NAME}: {invocation!r}")
+            if tool_names and name not in tool_names:
+                raise ValueError(f"Unknown tool selected: {name}")
+            args = invocation.get("arguments") or {}
+            if isinstance(args, str):
+                try:
+                    args = json.loads(args)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Invalid arguments for tool {name}: {e}")
+            if not isinstance(args, dict):
+                # Valid JSON, but not an object of named arguments (e.g. "[1, 2]" or "3")
+                raise ValueError(f"Invalid arguments for tool {name}: expected a JSON object, got {args!r}")
+            tool_calls.append({
+                "name": name,
+                "args": args,
+                "id": _new_tool_call_id()
+            })
+        return tool_calls
+
     @property
     def b(self):
         """
@@ -488,13 +985,27 @@ class ChatBaml(BaseChatModel):
         ChatBaml configuration applied. It allows calling BAML functions directly
         on the ChatBaml instance using the syntax: chat_baml.b.function_name(args).
 
+        The client is cached together with its ClientRegistry, so repeated access is cheap
+        until a configuration field changes.
+
         Returns:
             BAML client instance: A BAML client configured with the current ChatBaml settings
 
         Example:
             >>> result = chat_baml.b.ChooseTool(baml_state, {"tb": tb})
         """
-        return baml_root_client.with_options(client_registry=self._get_client_registry())
+        return self._get_cached_client()[1]
+
+    @property
+    def ab(self):
+        """
+        Async counterpart of `b`: the BAML async client configured with the current
+        ChatBaml settings, sharing the same cached ClientRegistry.
+
+        Example:
+            >>> result = await chat_baml.ab.ChooseTool(baml_state, {"tb": tb})
+        """
+        return self._get_cached_client()[2]
 
     def bind_tools(
         self,
@@ -506,9 +1017,9 @@ class ChatBaml(BaseChatModel):
         Returns a new runnable with tools pre-bound for BAML execution.
 
         This method follows the LangChain pattern for tool binding but uses BAML's
-        tool system directly. It prepares the tools for BAML conversion and stores
-        tool names for validation during execution. The actual BAML conversion happens
-        in the _generate() method.
+        tool system directly. It prepares the tools for BAML conversion and binds their
+        names, computed once here, for validating the selected tool during execution.
+        The actual BAML conversion happens in the _generate() method.
 
         Args:
             tools: List of Pydantic BaseModel classes and/or callable functions to bind
@@ -541,13 +1052,12 @@ class ChatBaml(BaseChatModel):
             if not tools_to_bind:
                 raise ValueError(f"Tool '{tool_choice}' not found in provided tools")
 
-        # self tool names for validation later
-        self._tool_names = [ cls.name if hasattr(cls, 'name') else cls.__name__ for cls in tools_to_bind ]
-        
         # Create extra dict as specified by user
         extra: Dict[str, Any] = {
             "tools": tools_to_bind,  # Pass tools through
-            "tool_choice": tool_choice
+            "tool_choice": tool_choice,
+            # Names for validating the selected tool, computed once per binding
+            "_tool_names": _tool_names_of(tools_to_bind),
         }
 
         # Return bound instance - BAML conversion happens later in _generate()
@@ -559,8 +1069,8 @@ class ChatBaml(BaseChatModel):
 
         This method allows calling BAML functions directly on the ChatBaml instance
         by proxying attribute access to the underlying BAML client. If an attribute
-        is not found on the ChatBaml instance, it attempts to retrieve it from the
-        configured BAML client.
+        is not found on the ChatBaml instance and is a public attribute of the BAML
+        client, it is retrieved from the configured BAML client.
 
         Args:
             name: Name of the attribute to retrieve
@@ -572,9 +1082,14 @@ class ChatBaml(BaseChatModel):
             AttributeError: If the attribute is not found on either ChatBaml or the BAML client
         """
         try:
-            return super().__getattribute__(name)
+            # BaseModel.__getattr__ resolves pydantic private attributes
+            return super().__getattr__(name)
         except AttributeError:
-            logger.debug(f"Proxying BAML function call: {name}")
+            # Only proxy names the BAML client actually has, so stray lookups from
+            # pydantic/LangChain internals don't build a client just to fail
+            if name.startswith("_") or name not in _BAML_CLIENT_ATTRS:
+                raise
+            logger.debug("Proxying BAML function call: %s", name)
             return getattr(self.b, name)
 
     def _generate(
@@ -616,37 +1131,482 @@ class ChatBaml(BaseChatModel):
         tools = kwargs.get('tools', [])
         # Convert LangChain messages to BAML format
         baml_messages = self._convert_to_baml_messages(messages)
-        # Create BamlState with converted messages
-        baml_state = BamlState(messages=baml_messages)
+        # Create BamlState with converted messages, already valid so skip validation
+        baml_state = BamlState.model_construct(messages=baml_messages)
 
         # Prepare type builder with dynamic schema for tools
         tb = self._prepare_tb(
             tools=tools
         )
+        # Computed before server-side tools append to the state
+        cache_key = self._response_cache_key(baml_state, tb)
+        result = self._cached_response(cache_key, tb)
+        if result is not None:
+            logger.debug("BAML response served from cache")
+            return self._to_chat_result(result, _call_tool_names(kwargs, tools))
         # Call the chat completion request method
+        result = self._call_baml(baml_state, tb)
+
+        # Run server-side tools and call the model again without leaving this call;
+        # errors raised by the tools themselves propagate unchanged
+        rounds = 0
+        while rounds < self.max_tool_rounds and (call := self._server_side_tool_call(result)) is not None:
+            self._append_tool_round(baml_state, call, self._run_server_side_tool(call))
+            result = self._call_baml(baml_state, tb)
+            rounds += 1
+        if self._server_side_tool_call(result) is not None:
+            # Out of rounds: ask once more without the server-side tools, so the
+            # caller never gets a tool call it has no tool for
+            result = self._call_baml(baml_state, self._client_side_tb(tools))
+
+        self._store_response(cache_key, tb, result)
+        return self._to_chat_result(result, _call_tool_names(kwargs, tools))
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """
+        Native async generation using the BAML async client.
+
+        Mirrors _generate(), but awaits the BAML call instead of running the sync
+        client in a thread, so many requests can be in flight on one event loop.
+
+        Raises:
+            NotImplementedError: If context handling is requested (not yet implemented)
+            RuntimeError: If BAML function execution fails
+        """
+        context = kwargs.get("context")
+        if context:
+            raise NotImplementedError("context handling not implemented yet; will be added later")
+
+        tools = kwargs.get('tools', [])
+        # Convert LangChain messages to BAML format
+        baml_messages = await self._aconvert_to_baml_messages(messages)
+        # Create BamlState with converted messages, already valid so skip validation
+        baml_state = BamlState.model_construct(messages=baml_messages)
+
+        # Prepare type builder with dynamic schema for tools
+        tb = self._prepare_tb(
+            tools=tools
+        )
+        cache_key = self._response_cache_key(baml_state, tb)
+        result = self._cached_response(cache_key, tb)
+        if result is not None:
+            logger.debug("BAML response served from cache")
+            return self._to_chat_result(result, _call_tool_names(kwargs, tools))
+        result = await self._acall_baml(baml_state, tb)
+
+        rounds = 0
+        while rounds < self.max_tool_rounds and (call := self._server_side_tool_call(result)) is not None:
+            self._append_tool_round(baml_state, call, await self._arun_server_side_tool(call))
+            result = await self._acall_baml(baml_state, tb)
+            rounds += 1
+        if self._server_side_tool_call(result) is not None:
+            result = await self._acall_baml(baml_state, self._client_side_tb(tools))
+
+        self._store_response(cache_key, tb, result)
+        return self._to_chat_result(result, _call_tool_names(kwargs, tools))
+
+    def _to_chat_result(self, result: Union[str, DynamicSchema], tool_names: Collection[str] = ()) -> ChatResult:
+        """Wraps a Chat (text) or ChooseTool (DynamicSchema) result in a ChatResult."""
+        if isinstance(result, str):
+            # Chat response, or ChooseTool answered with text instead of selecting a tool
+            return ChatResult(generations=[ChatGeneration(
+                message=AIMessage(content=result)
+            )])
+        # New tool call ids each time, also for cached results
+        ai_message = self._convert_to_ai_message(result, tool_names=tool_names)
+
+        generation = ChatGeneration(
+            message=ai_message,
+            generation_info={"baml": result}
+        )
+        return ChatResult(generations=[generation])
+
+    def _response_cache_key(self, baml_state: BamlState, tb: Optional[TypeBuilder]) -> Optional[bytes]:
+        """
+        Digest identifying a request for the response cache, or None if responses
+        must not be cached (cache disabled, non-zero temperature or server-side
+        tools, whose calls must run on every request).
+        """
+        if not self.enable_response_cache or self.temperature != 0.0 or self.server_side_tools:
+            return None
         try:
-            if tb is not None and tools:
-                result = self.b.ChooseTool(baml_state, {"tb": tb})
-                logger.debug(f"BAML ChooseTool response received: {type(result)}")
+            state_json = baml_state.model_dump_json()
+        except Exception:
+            # e.g. content pydantic can't serialize, such as some image objects
+            return None
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr(self._client_config_key()).encode())
+        h.update(repr((self.property_name, self.enable_batch_tool, id(tb))).encode())
+        h.update(state_json.encode())
+        return h.digest()
+
+    def _cached_response(self, key: Optional[bytes], tb: Optional[TypeBuilder]) -> Any:
+        """Cached BAML result for key, or None on a miss."""
+        if key is None:
+            return None
+        with _response_cache_lock:
+            entry = self._response_cache.get(key)
+            # The TypeBuilder id is part of the key, make sure it was not recycled
+            if entry is None or entry[0] is not tb:
+                return None
+            self._response_cache.move_to_end(key)
+            # The caller's message shares the result's dicts, e.g. tool call args
+            return copy.deepcopy(entry[1])
+
+    def _store_response(self, key: Optional[bytes], tb: Optional[TypeBuilder], result: Any) -> None:
+        if key is None:
+            return
+        # Snapshot, so changes made to the returned message don't reach later hits
+        result = copy.deepcopy(result)
+        with _response_cache_lock:
+            self._response_cache[key] = (tb, result)
+            self._response_cache.move_to_end(key)
+            while len(self._response_cache) > self.response_cache_size:
+                self._response_cache.popitem(last=False)
+
+    def _call_baml(self, baml_state: BamlState, tb: Optional[TypeBuilder]) -> Union[str, DynamicSchema]:
+        """
+        ChooseTool with the tools of tb, or Chat when there are none.
+
+        Raises:
+            RuntimeError: If BAML function execution fails
+        """
+        try:
+            if tb is not None:
+                result = self.b.ChooseTool(baml_state, self._baml_options(tb))
+                logger.debug("BAML ChooseTool response received: %s", type(result))
             else:
                 result = self.b.Chat(baml_state)
-                logger.debug(f"BAML Chat response received: {type(result)}")
-                return ChatResult(generations=[ChatGeneration(
-                    message=AIMessage(content=result)
-                )])
+                logger.debug("BAML Chat response received: %s", type(result))
         except Exception as e:
             logger.error(f"BAML function call failed: {e}")
             raise RuntimeError(f"BAML function execution failed: {e}")
+        return result
 
-        ai_message = self._convert_to_ai_message(result)
+    async def _acall_baml(self, baml_state: BamlState, tb: Optional[TypeBuilder]) -> Union[str, DynamicSchema]:
+        """
+        Async counterpart of _call_baml().
 
-        # Create ChatGeneration
-        generation = ChatGeneration(
-            message=ai_message,
-            generation_info={"baml": result}
+        Raises:
+            RuntimeError: If BAML function execution fails
+        """
+        try:
+            if tb is not None:
+                result = await self.ab.ChooseTool(baml_state, self._baml_options(tb))
+                logger.debug("BAML ChooseTool response received: %s", type(result))
+            else:
+                result = await self.ab.Chat(baml_state)
+                logger.debug("BAML Chat response received: %s", type(result))
+        except Exception as e:
+            logger.error(f"BAML function call failed: {e}")
+            raise RuntimeError(f"BAML function execution failed: {e}")
+        return result
+
+    def _client_side_tb(self, tools: Optional[List[Any]]) -> Optional[TypeBuilder]:
+        """TypeBuilder for tools without the server_side_tools, used once max_tool_rounds is spent."""
+        return self._prepare_tb(
+            tools=[tool for tool in tools or () if _tool_name(tool) not in self.server_side_tools]
         )
-        # Return ChatResult
-        return ChatResult(generations=[generation])
+
+    def _server_side_tool_call(self, result: Any) -> Optional[Tuple[Any, str, Dict[str, Any]]]:
+        """(tool, name, arguments) if result selects one of server_side_tools, else None."""
+        if not self.server_side_tools:
+            return None
+        tool_dict = getattr(result, self.property_name, None)
+        if not isinstance(tool_dict, dict):
+            return None
+        name = tool_dict.get("name")
+        tool = self.server_side_tools.get(name)
+        if tool is None:
+            return None
+        return tool, name, tool_dict.get("arguments") or {}
+
+    @staticmethod
+    def _run_server_side_tool(call: Tuple[Any, str, Dict[str, Any]]) -> Any:
+        """
+        Executes a server-side tool call from the sync generate path.
+
+        Raises:
+            TypeError: If the tool is an async callable, which needs ainvoke()
+        """
+        tool, name, args = call
+        if isinstance(tool, BaseTool):
+            return tool.invoke(args)
+        output = tool(**args)
+        if inspect.isawaitable(output):
+            if inspect.iscoroutine(output):
+                output.close()
+            raise TypeError(f"Server-side tool {name} is async, call the model with ainvoke()")
+        return output
+
+    @staticmethod
+    async def _arun_server_side_tool(call: Tuple[Any, str, Dict[str, Any]]) -> Any:
+        """Executes a server-side tool call without blocking the event loop."""
+        tool, name, args = call
+        if isinstance(tool, BaseTool):
+            return await tool.ainvoke(args)
+        if inspect.iscoroutinefunction(tool):
+            return await tool(**args)
+        # Plain callables may block, run them in a worker thread
+        output = await asyncio.to_thread(tool, **args)
+        if inspect.isawaitable(output):
+            output = await output
+        return output
+
+    @staticmethod
+    def _append_tool_round(baml_state: BamlState, call: Tuple[Any, str, Dict[str, Any]], output: Any) -> None:
+        """Appends a server-side tool call and its output to baml_state for the next model call."""
+        _, name, args = call
+        logger.debug("Executed server-side tool %s", name)
+        baml_state.messages.append(BamlBaseMessage(
+            role="assistant",
+            content_block=ContentBlock(
+                text="",
+                tool_call=ToolCall(
+                    name=name,
+                    args=dumps_tool_args(args)
+                )
+            )
+        ))
+        baml_state.messages.append(BamlBaseMessage(
+            role="tool",
+            content_block=ContentBlock(text=output if isinstance(output, str) else str(output))
+        ))
+
+    async def abatch(
+        self,
+        inputs: List[Any],
+        config: Optional[Union[RunnableConfig, List[RunnableConfig]]] = None,
+        *,
+        return_exceptions: bool = False,
+        **kwargs: Any,
+    ) -> List[Any]:
+        """
+        Runs all inputs concurrently through _agenerate().
+
+        Requests share the cached BAML async client and are bounded by max_concurrency
+        unless the RunnableConfig sets its own max_concurrency. When there are more
+        inputs than the limit, the longest prompts are started first so a slow request
+        doesn't end up alone at the tail of the batch. Results keep the input order.
+        """
+        if not inputs:
+            return []
+        configs = get_config_list(config, len(inputs))
+        if self.max_concurrency is not None:
+            configs = [
+                c if c.get("max_concurrency") is not None else {**c, "max_concurrency": self.max_concurrency}
+                for c in configs
+            ]
+
+        limit = configs[0].get("max_concurrency")
+        if limit is None or len(inputs) <= limit:
+            return await super().abatch(
+                inputs, configs, return_exceptions=return_exceptions, **kwargs
+            )
+
+        order = sorted(range(len(inputs)), key=lambda i: self._input_size(inputs[i]), reverse=True)
+        outputs = await super().abatch(
+            [inputs[i] for i in order],
+            [configs[i] for i in order],
+            return_exceptions=return_exceptions,
+            **kwargs,
+        )
+        results: List[Any] = [None] * len(inputs)
+        for i, output in zip(order, outputs):
+            results[i] = output
+        return results
+
+    def _input_size(self, input: Any) -> int:
+        """Rough prompt size used to order abatch() inputs: total length of the message contents."""
+        try:
+            messages = self._convert_input(input).to_messages()
+        except Exception:
+            # Invalid input, abatch() reports the error when it runs it
+            return 0
+        return sum(len(m.content) for m in messages)
+
+    def _batch_api_client(self) -> httpx.Client:
+        """HTTP client for the OpenAI Files/Batches endpoints of the configured server."""
+        api_key = self.api_key or os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError(
+                "No OpenAI API key provided. "
+                "Either pass api_key=... when initializing ChatBaml, "
+                "or set the OPENAI_API_KEY environment variable."
+            )
+        return httpx.Client(
+            base_url=(self.base_url or _OPENAI_BASE_URL).rstrip("/"),
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=_BATCH_API_TIMEOUT,
+        )
+
+    def submit_batch(
+        self,
+        message_lists: List[List[BaseMessage]],
+        tools: Optional[List[Union[Type[BaseModel], Callable]]] = None,
+        completion_window: str = "24h",
+    ) -> str:
+        """
+        Submits many conversations as one OpenAI Batch API job.
+
+        Each conversation is rendered into the same chat completion request BAML would
+        send (ChooseTool when tools are given, Chat otherwise), written to a JSONL file,
+        uploaded, and queued. Batch jobs are cheaper than regular requests but may take
+        up to `completion_window` to finish; collect the results with fetch_batch().
+
+        Args:
+            message_lists: One list of LangChain messages per request
+            tools: Optional tools offered to every request
+            completion_window: Batch completion window accepted by the API
+
+        Returns:
+            str: The batch id to pass to fetch_batch()
+        """
+        tb = self._prepare_tb(tools=tools)
+        lines = []
+        for i, messages in enumerate(message_lists):
+            baml_state = BamlState.model_construct(messages=self._convert_to_baml_messages(messages))
+            if tb is not None:
+                request = self.b.request.ChooseTool(baml_state, self._baml_options(tb))
+            else:
+                request = self.b.request.Chat(baml_state)
+            lines.append(json.dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": request.body.json(),
+            }, ensure_ascii=False))
+
+        with self._batch_api_client() as client:
+            upload = client.post(
+                "/files",
+                data={"purpose": "batch"},
+                files={"file": ("batch.jsonl", "\n".join(lines).encode(), "application/jsonl")},
+            )
+            upload.raise_for_status()
+            batch = client.post("/batches", json={
+                "input_file_id": upload.json()["id"],
+                "endpoint": "/v1/chat/completions",
+                "completion_window": completion_window,
+            })
+            batch.raise_for_status()
+        batch_id = batch.json()["id"]
+        logger.debug("Submitted batch %s with %d requests", batch_id, len(lines))
+        return batch_id
+
+    def fetch_batch(
+        self,
+        batch_id: str,
+        tools: Optional[List[Union[Type[BaseModel], Callable]]] = None,
+        *,
+        return_exceptions: bool = False,
+    ) -> Optional[List[Union[ChatResult, Exception]]]:
+        """
+        Collects the results of a job created by submit_batch().
+
+        Successful requests are read from the batch output file and failed ones from
+        its error file, then matched back to their conversation by custom_id.
+
+        Args:
+            batch_id: Id returned by submit_batch()
+            tools: The same tools that were passed to submit_batch()
+            return_exceptions: If True, a failed or missing request gets a RuntimeError
+                at its index instead of failing the whole call
+
+        Returns:
+            Optional[List[Union[ChatResult, Exception]]]: One entry per submitted
+            conversation, in order, or None while the batch is still running
+
+        Raises:
+            RuntimeError: If the batch failed, expired or was cancelled, or, unless
+                return_exceptions is True, if any request in it failed or is missing
+        """
+        with self._batch_api_client() as client:
+            response = client.get(f"/batches/{batch_id}")
+            response.raise_for_status()
+            batch = response.json()
+            status = batch["status"]
+            if status in _BATCH_PENDING_STATUSES:
+                return None
+            if status != "completed":
+                raise RuntimeError(f"Batch {batch_id} did not complete: status={status}")
+            # Either file is null when no request ended up in it
+            files = []
+            for key in ("output_file_id", "error_file_id"):
+                file_id = batch.get(key)
+                if file_id:
+                    content = client.get(f"/files/{file_id}/content")
+                    content.raise_for_status()
+                    files.append(content.text)
+
+        n_submitted = batch["request_counts"]["total"]
+        tool_names = _tool_names_of(tools)
+        tb = self._prepare_tb(tools=tools)
+        results: List[Union[ChatResult, Exception, None]] = [None] * n_submitted
+        for text in files:
+            for line in text.splitlines():
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    record = None
+                index = self._batch_record_index(record, n_submitted)
+                if index is None:
+                    # Its request, if any, is reported as missing below
+                    logger.warning("Skipping batch %s record without a valid custom_id: %.200s", batch_id, line)
+                    continue
+                response = record.get("response")
+                if not isinstance(response, dict):
+                    response = {}
+                if record.get("error") or response.get("status_code") != 200:
+                    results[index] = RuntimeError(
+                        f"Batch request {index} failed: {record.get('error') or response}"
+                    )
+                    continue
+                try:
+                    content = response["body"]["choices"][0]["message"]["content"]
+                    if tb is not None:
+                        # A text answer parses to str, like in _generate()
+                        result = self.b.parse.ChooseTool(content, self._baml_options(tb))
+                    else:
+                        result = self.b.parse.Chat(content)
+                    results[index] = self._to_chat_result(result, tool_names)
+                except Exception as e:
+                    results[index] = RuntimeError(f"Batch request {index} could not be parsed: {e}")
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        for i in missing:
+            results[i] = RuntimeError(f"Batch request {i} has no result in batch {batch_id}")
+        if not return_exceptions:
+            failed = [i for i, result in enumerate(results) if isinstance(result, Exception)]
+            if failed:
+                raise RuntimeError(
+                    f"Batch {batch_id}: requests {failed} failed or are missing, "
+                    f"first error: {results[failed[0]]}"
+                )
+        return results
+
+    @staticmethod
+    def _batch_record_index(record: Any, n_submitted: int) -> Optional[int]:
+        """
+        Index of the submitted conversation a batch output/error record belongs to,
+        or None if its custom_id isn't one submit_batch() wrote.
+        """
+        custom_id = record.get("custom_id") if isinstance(record, dict) else None
+        # submit_batch() writes str(i); reject anything else, e.g. "-1" or " 3"
+        if not isinstance(custom_id, str) or not custom_id.isdecimal() or not custom_id.isascii():
+            return None
+        index = int(custom_id)
+        if index >= n_submitted or custom_id != str(index):
+            return None
+        return index
 
 # Quick test
 import asyncio
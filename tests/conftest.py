@@ -0,0 +1,255 @@
+"""
+Shared fixtures.
+
+Tests talk to FakeOpenAI, a local OpenAI-compatible server, so requests go through
+the real BAML runtime: prompt rendering, HTTP, streaming, parsing and cancellation.
+The BAML client has to be generated first (baml-cli generate --from baml_src).
+
+The sync BAML stream keeps the GIL while it waits for the response, which starves
+the server thread, so tests stream with astream().
+"""
+import json
+import threading
+import time
+from collections import deque
+from email.parser import BytesParser
+from email.policy import default as email_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+import pytest
+
+
+class FakeOpenAI:
+    """
+    Minimal OpenAI-compatible API: chat completions (plain and streamed), file
+    uploads and batches.
+
+    Queue assistant replies in `replies`; every chat completion pops the next one
+    and records its request body in `requests`. Once the queue is empty it answers
+    default_reply(body), "ok" unless replaced.
+    """
+
+    def __init__(self) -> None:
+        self.replies: deque = deque()
+        self.requests: List[Dict[str, Any]] = []
+        self.default_reply: Callable[[Dict[str, Any]], str] = lambda body: "ok"
+        # Seconds before a plain completion is answered
+        self.reply_delay = 0.0
+        # Seconds between two streamed chunks
+        self.stream_delay = 0.0
+        # Most chat completions handled at the same time so far
+        self.max_in_flight = 0
+        self._in_flight = 0
+        # Set when a client disconnects in the middle of a stream
+        self.stream_aborted = threading.Event()
+        self.files: Dict[str, str] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}/v1"
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def add_file(self, content: str) -> str:
+        with self._lock:
+            file_id = f"file-{len(self.files)}"
+            self.files[file_id] = content
+        return file_id
+
+    def batch_input(self, batch_id: str) -> List[Dict[str, Any]]:
+        """The JSONL requests uploaded for a batch."""
+        content = self.files[self.batches[batch_id]["input_file_id"]]
+        return [json.loads(line) for line in content.splitlines()]
+
+    def complete_batch(
+        self,
+        batch_id: str,
+        output: Optional[List[Dict[str, Any]]] = None,
+        errors: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """Marks a batch completed with the given output and error file records."""
+        batch = self.batches[batch_id]
+        batch["status"] = "completed"
+        for key, records in (("output_file_id", output), ("error_file_id", errors)):
+            if records:
+                batch[key] = self.add_file("\n".join(json.dumps(r) for r in records) + "\n")
+
+    def _next_reply(self, body: Dict[str, Any]) -> str:
+        with self._lock:
+            self.requests.append(body)
+            if self.replies:
+                return self.replies.popleft()
+        return self.default_reply(body)
+
+    def _completion(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        try:
+            reply = self._next_reply(body)
+            time.sleep(self.reply_delay)
+            return _completion(reply)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def _send_json(self, payload: Any, status: int = 200) -> None:
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_text(self, text: str) -> None:
+                data = text.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+            def do_POST(self) -> None:
+                if self.path == "/v1/chat/completions":
+                    body = json.loads(self._body())
+                    if body.get("stream"):
+                        self._stream(fake._next_reply(body))
+                    else:
+                        self._send_json(fake._completion(body))
+                elif self.path == "/v1/files":
+                    message = BytesParser(policy=email_policy).parsebytes(
+                        f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + self._body()
+                    )
+                    upload = next(
+                        part for part in message.iter_parts() if part.get_param("name", header="content-disposition") == "file"
+                    )
+                    self._send_json({"id": fake.add_file(upload.get_content())})
+                elif self.path == "/v1/batches":
+                    body = json.loads(self._body())
+                    with fake._lock:
+                        batch_id = f"batch-{len(fake.batches)}"
+                        n = len(fake.files[body["input_file_id"]].splitlines())
+                        fake.batches[batch_id] = {
+                            "id": batch_id,
+                            "status": "validating",
+                            "input_file_id": body["input_file_id"],
+                            "output_file_id": None,
+                            "error_file_id": None,
+                            "request_counts": {"total": n, "completed": 0, "failed": 0},
+                        }
+                    self._send_json(fake.batches[batch_id])
+                else:
+                    self._send_json({"error": {"message": f"unknown path {self.path}"}}, 404)
+
+            def do_GET(self) -> None:
+                parts = self.path.strip("/").split("/")
+                if parts[:2] == ["v1", "batches"] and parts[2] in fake.batches:
+                    self._send_json(fake.batches[parts[2]])
+                elif parts[:2] == ["v1", "files"] and parts[3:] == ["content"] and parts[2] in fake.files:
+                    self._send_text(fake.files[parts[2]])
+                else:
+                    self._send_json({"error": {"message": f"unknown path {self.path}"}}, 404)
+
+            def _stream(self, reply: str) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for word in reply.split(" "):
+                        self._chunk(_completion_chunk(word + " "))
+                        time.sleep(fake.stream_delay)
+                    self._chunk("[DONE]")
+                    self.wfile.write(b"0\r\n\r\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    fake.stream_aborted.set()
+
+            def _chunk(self, payload: Any) -> None:
+                data = payload if isinstance(payload, str) else json.dumps(payload)
+                event = f"data: {data}\n\n".encode()
+                self.wfile.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def _completion(content: str) -> Dict[str, Any]:
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "test-model",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    }
+
+
+def _completion_chunk(content: str) -> Dict[str, Any]:
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion.chunk",
+        "created": 0,
+        "model": "test-model",
+        "choices": [{"index": 0, "delta": {"content": content}, "finish_reason": None}],
+    }
+
+
+@pytest.fixture
+def openai_server():
+    server = FakeOpenAI()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def chat(openai_server):
+    """A ChatBaml pointed at openai_server."""
+    from custom_langchain_model.llms.chat_baml import ChatBaml
+
+    return ChatBaml(api_key="test-key", base_url=openai_server.base_url, model="test-model")
+
+
+@pytest.fixture
+def serve_images(monkeypatch):
+    """
+    Routes image fetches to handler(request) -> httpx.Response, sync and async,
+    starting from an empty image cache.
+    """
+    from custom_langchain_model.helpers import messages
+
+    def install(handler):
+        transport = httpx.MockTransport(handler)
+        monkeypatch.setattr(messages, "_client", httpx.Client(transport=transport))
+        monkeypatch.setattr(messages, "get_async_client", lambda: httpx.AsyncClient(transport=transport))
+
+    messages.clear_image_cache()
+    yield install
+    messages.clear_image_cache()
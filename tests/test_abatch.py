@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("custom_langchain_model.baml_client")
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import HumanMessage
+
+from custom_langchain_model.llms.chat_baml import ChatBaml
+
+
+def _echo(body):
+    """Replies with the text of the last message, so results can be told apart."""
+    content = body["messages"][-1]["content"]
+    if isinstance(content, list):
+        content = "".join(part.get("text", "") for part in content)
+    return content.strip()
+
+
+@pytest.fixture
+def echo_server(openai_server):
+    openai_server.default_reply = _echo
+    return openai_server
+
+
+def test_results_keep_input_order(chat, echo_server):
+    echo_server.reply_delay = 0.05
+    inputs = [[HumanMessage(f"m{i}")] for i in range(8)]
+
+    results = asyncio.run(chat.abatch(inputs))
+
+    assert [r.content for r in results] == [f"m{i}" for i in range(8)]
+
+
+def test_concurrency_bounded_by_max_concurrency(echo_server):
+    chat = ChatBaml(api_key="test-key", base_url=echo_server.base_url, model="test-model", max_concurrency=3)
+    echo_server.reply_delay = 0.1
+    inputs = [[HumanMessage(f"m{i}")] for i in range(9)]
+
+    results = asyncio.run(chat.abatch(inputs))
+
+    assert [r.content for r in results] == [f"m{i}" for i in range(9)]
+    # Requests really overlapped, but never more than the limit
+    assert echo_server.max_in_flight == 3
+
+
+def test_config_max_concurrency_wins(chat, echo_server):
+    echo_server.reply_delay = 0.1
+    inputs = [[HumanMessage(f"m{i}")] for i in range(4)]
+
+    asyncio.run(chat.abatch(inputs, {"max_concurrency": 1}))
+
+    assert echo_server.max_in_flight == 1
+
+
+def test_longest_prompts_start_first(echo_server):
+    chat = ChatBaml(api_key="test-key", base_url=echo_server.base_url, model="test-model", max_concurrency=1)
+    prompts = ["short", "a much longer prompt than the others", "mid length", "x"]
+
+    results = asyncio.run(chat.abatch([[HumanMessage(p)] for p in prompts]))
+
+    assert [_echo(body) for body in echo_server.requests] == sorted(prompts, key=len, reverse=True)
+    assert [r.content for r in results] == prompts
+
+
+def test_configs_follow_their_inputs_when_reordered(echo_server):
+    chat = ChatBaml(api_key="test-key", base_url=echo_server.base_url, model="test-model", max_concurrency=1)
+    prompts = ["x", "the longest prompt"]
+    configs = [{"max_concurrency": 1, "run_name": "x"}, {"max_concurrency": 1, "run_name": "longest"}]
+    seen = []
+
+    class RunNames(BaseCallbackHandler):
+        def on_chat_model_start(self, serialized, messages, *, name=None, **kwargs):
+            seen.append((name, messages[0][0].content))
+
+    configs = [{**c, "callbacks": [RunNames()]} for c in configs]
+    asyncio.run(chat.abatch([[HumanMessage(p)] for p in prompts], configs))
+
+    assert seen == [("longest", "the longest prompt"), ("x", "x")]
+
+
+def test_return_exceptions_keeps_input_order(echo_server):
+    chat = ChatBaml(api_key="test-key", base_url=echo_server.base_url, model="test-model", max_concurrency=1)
+    inputs = [[HumanMessage("short")], 42, [HumanMessage("the long one")]]
+
+    results = asyncio.run(chat.abatch(inputs, return_exceptions=True))
+
+    assert results[0].content == "short"
+    assert isinstance(results[1], Exception)
+    assert results[2].content == "the long one"
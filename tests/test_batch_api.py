@@ -0,0 +1,134 @@
+import json
+
+import pytest
+
+pytest.importorskip("custom_langchain_model.baml_client")
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.outputs import ChatResult
+from pydantic import BaseModel
+
+
+class get_weather(BaseModel):
+    """Weather for a city"""
+    city: str
+
+
+def _ok(custom_id, content):
+    return {
+        "custom_id": custom_id,
+        "response": {
+            "status_code": 200,
+            "body": {"choices": [{"message": {"role": "assistant", "content": content}}]},
+        },
+        "error": None,
+    }
+
+
+def _failed(custom_id):
+    return {"custom_id": custom_id, "response": None, "error": {"code": "server_error", "message": "boom"}}
+
+
+def _submit(chat, n, tools=None):
+    return chat.submit_batch([[HumanMessage(f"m{i}")] for i in range(n)], tools=tools)
+
+
+def test_submit_writes_the_baml_requests(chat, openai_server):
+    batch_id = chat.submit_batch(
+        [[SystemMessage("be brief"), HumanMessage("hi")], [HumanMessage("there")]],
+        tools=[get_weather],
+    )
+
+    lines = openai_server.batch_input(batch_id)
+    assert [line["custom_id"] for line in lines] == ["0", "1"]
+    assert all(line["url"] == "/v1/chat/completions" and line["method"] == "POST" for line in lines)
+    body = lines[0]["body"]
+    assert body["model"] == "test-model"
+    # The ChooseTool prompt with the tool schema, as BAML would send it
+    assert "get_weather" in json.dumps(body["messages"])
+    assert openai_server.batches[batch_id]["request_counts"]["total"] == 2
+    # Nothing was sent to the chat endpoint itself
+    assert openai_server.requests == []
+
+
+def test_fetch_pending_returns_none(chat, openai_server):
+    batch_id = _submit(chat, 2)
+    assert chat.fetch_batch(batch_id) is None
+
+
+def test_fetch_matches_results_by_custom_id(chat, openai_server):
+    batch_id = _submit(chat, 3)
+    # Output files aren't in input order
+    openai_server.complete_batch(batch_id, output=[_ok("2", "two"), _ok("0", "zero"), _ok("1", "one")])
+
+    results = chat.fetch_batch(batch_id)
+
+    assert all(isinstance(r, ChatResult) for r in results)
+    assert [r.generations[0].message.content for r in results] == ["zero", "one", "two"]
+
+
+def test_fetch_parses_tool_calls(chat, openai_server):
+    batch_id = _submit(chat, 2, tools=[get_weather])
+    openai_server.complete_batch(batch_id, output=[
+        _ok("0", '{"selected_tool": {"name": "get_weather", "arguments": {"city": "Paris"}}}'),
+        _ok("1", "no tool needed"),
+    ])
+
+    first, second = chat.fetch_batch(batch_id, tools=[get_weather])
+
+    tool_call = first.generations[0].message.tool_calls[0]
+    assert (tool_call["name"], tool_call["args"]) == ("get_weather", {"city": "Paris"})
+    assert second.generations[0].message.content == "no tool needed"
+
+
+def test_fetch_reads_the_error_file(chat, openai_server):
+    batch_id = _submit(chat, 2)
+    openai_server.complete_batch(batch_id, output=[_ok("0", "zero")], errors=[_failed("1")])
+
+    with pytest.raises(RuntimeError, match=r"requests \[1\] failed"):
+        chat.fetch_batch(batch_id)
+
+    zero, one = chat.fetch_batch(batch_id, return_exceptions=True)
+    assert zero.generations[0].message.content == "zero"
+    assert isinstance(one, RuntimeError) and "boom" in str(one)
+
+
+def test_fetch_with_only_an_error_file(chat, openai_server):
+    batch_id = _submit(chat, 1)
+    # output_file_id stays null
+    openai_server.complete_batch(batch_id, errors=[_failed("0")])
+
+    (result,) = chat.fetch_batch(batch_id, return_exceptions=True)
+    assert isinstance(result, RuntimeError)
+
+
+@pytest.mark.parametrize("custom_id", ["-1", "3", " 1", "01", "1.0", "١", 1, None, "request-1"])
+def test_fetch_ignores_foreign_custom_ids(chat, openai_server, custom_id):
+    batch_id = _submit(chat, 3)
+    openai_server.complete_batch(batch_id, output=[_ok("0", "zero"), _ok(custom_id, "stray"), _ok("2", "two")])
+
+    zero, one, two = chat.fetch_batch(batch_id, return_exceptions=True)
+
+    assert zero.generations[0].message.content == "zero"
+    assert two.generations[0].message.content == "two"
+    # The stray record didn't land anywhere, so request 1 is reported missing
+    assert isinstance(one, RuntimeError) and "has no result" in str(one)
+
+
+def test_fetch_skips_malformed_lines(chat, openai_server):
+    batch_id = _submit(chat, 2)
+    openai_server.complete_batch(batch_id, output=[_ok("0", "zero")])
+    batch = openai_server.batches[batch_id]
+    openai_server.files[batch["output_file_id"]] += "not json\n[1, 2]\n" + json.dumps(_ok("1", "one")) + "\n"
+
+    zero, one = chat.fetch_batch(batch_id)
+    assert zero.generations[0].message.content == "zero"
+    assert one.generations[0].message.content == "one"
+
+
+def test_fetch_failed_batch_raises(chat, openai_server):
+    batch_id = _submit(chat, 1)
+    openai_server.batches[batch_id]["status"] = "expired"
+
+    with pytest.raises(RuntimeError, match="status=expired"):
+        chat.fetch_batch(batch_id)
@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("custom_langchain_model.baml_client")
+
+from langchain_core.messages import HumanMessage
+from pydantic import BaseModel
+
+from custom_langchain_model.llms.chat_baml import ChatBaml
+
+
+class get_weather(BaseModel):
+    """Weather for a city"""
+    city: str
+
+
+class get_time(BaseModel):
+    """Local time in a city"""
+    city: str
+
+
+def _batch_call(*invocations):
+    return json.dumps({
+        "selected_tool": {"name": "batch_tool", "arguments": {"invocations": list(invocations)}}
+    })
+
+
+def _invocation(name, arguments):
+    return {"name": name, "arguments": arguments if isinstance(arguments, str) else json.dumps(arguments)}
+
+
+@pytest.fixture
+def batch_chat(openai_server):
+    chat = ChatBaml(api_key="test-key", base_url=openai_server.base_url, model="test-model", enable_batch_tool=True)
+    return chat.bind_tools([get_weather, get_time])
+
+
+def test_batch_tool_offered_only_when_enabled(chat, openai_server):
+    chat.bind_tools([get_weather]).invoke([HumanMessage("hi")])
+    ChatBaml(
+        api_key="test-key", base_url=openai_server.base_url, model="test-model", enable_batch_tool=True
+    ).bind_tools([get_weather]).invoke([HumanMessage("hi")])
+
+    first, second = (body["messages"][0]["content"] for body in openai_server.requests)
+    assert 'name: "batch_tool"' not in first
+    assert 'name: "batch_tool"' in second
+
+
+def test_invocations_become_separate_tool_calls(batch_chat, openai_server):
+    openai_server.replies.append(_batch_call(
+        _invocation("get_weather", {"city": "Paris"}),
+        _invocation("get_time", {"city": "Tokyo"}),
+    ))
+
+    message = batch_chat.invoke([HumanMessage("hi")])
+
+    assert [(c["name"], c["args"]) for c in message.tool_calls] == [
+        ("get_weather", {"city": "Paris"}),
+        ("get_time", {"city": "Tokyo"}),
+    ]
+    assert len({c["id"] for c in message.tool_calls}) == 2
+
+
+def test_streamed_batch_tool_is_expanded(batch_chat, openai_server):
+    openai_server.replies.append(_batch_call(
+        _invocation("get_weather", {"city": "Paris"}),
+        _invocation("get_time", {"city": "Tokyo"}),
+    ))
+
+    async def run():
+        return [chunk async for chunk in batch_chat.astream([HumanMessage("hi")])]
+
+    tool_calls = [c for chunk in asyncio.run(run()) for c in chunk.tool_calls]
+    assert [c["name"] for c in tool_calls] == ["get_weather", "get_time"]
+    assert tool_calls[0]["args"] == {"city": "Paris"}
+
+
+def test_plain_tool_calls_still_work(batch_chat, openai_server):
+    openai_server.replies.append(json.dumps({"selected_tool": {"name": "get_weather", "arguments": {"city": "Rome"}}}))
+
+    message = batch_chat.invoke([HumanMessage("hi")])
+
+    assert [(c["name"], c["args"]) for c in message.tool_calls] == [("get_weather", {"city": "Rome"})]
+
+
+@pytest.mark.parametrize("invocation, error", [
+    (_invocation("get_date", {"city": "Paris"}), "Unknown tool selected: get_date"),
+    (_invocation("get_weather", "{not json"), "Invalid arguments for tool get_weather"),
+    (_invocation("get_weather", "[1, 2]"), "expected a JSON object"),
+])
+def test_invalid_invocations_raise(batch_chat, openai_server, invocation, error):
+    openai_server.replies.append(_batch_call(_invocation("get_weather", {"city": "Paris"}), invocation))
+
+    with pytest.raises(ValueError, match=error):
+        batch_chat.invoke([HumanMessage("hi")])
+
+
+def test_invocation_without_a_name_is_dropped_by_baml(batch_chat, openai_server):
+    openai_server.replies.append(_batch_call(_invocation("get_weather", {"city": "Paris"}), {"arguments": "{}"}))
+
+    message = batch_chat.invoke([HumanMessage("hi")])
+
+    assert [c["name"] for c in message.tool_calls] == ["get_weather"]
+
+
+@pytest.mark.parametrize("arguments", [
+    None,
+    {"invocations": "get_weather"},
+    {"invocations": ["get_weather"]},
+    {"invocations": [{"name": 3, "arguments": "{}"}]},
+])
+def test_malformed_batch_tool_arguments_raise(arguments):
+    # Shapes the BAML schema normally rules out
+    with pytest.raises(ValueError, match="Invalid"):
+        ChatBaml(api_key="test-key", enable_batch_tool=True)._expand_batch_tool(arguments)
@@ -0,0 +1,118 @@
+import asyncio
+
+import httpx
+import pytest
+
+pytest.importorskip("custom_langchain_model.baml_client")
+
+from custom_langchain_model.helpers import messages
+from custom_langchain_model.helpers.messages import aget_image_base64_from_url, get_image_base64_from_url
+
+
+def _png(size):
+    return b"\x89PNG\r\n\x1a\n" + b"\0" * (size - 8)
+
+
+class Images:
+    """Serves _png(size) for https://img.test/<size>/<name> and counts the requests."""
+
+    def __init__(self):
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(request)
+        etag = '"v1"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304)
+        size = int(request.url.path.split("/")[1])
+        return httpx.Response(200, content=_png(size), headers={"Content-Type": "image/png", "ETag": etag})
+
+
+@pytest.fixture
+def images(serve_images):
+    handler = Images()
+    serve_images(handler)
+    return handler
+
+
+@pytest.fixture
+def small_cache(monkeypatch):
+    """4 KiB cache budget, 1 KiB per entry (sizes are of the base64 strings)."""
+    monkeypatch.setattr(messages, "_IMAGE_CACHE_MAX_BYTES", 4096)
+    monkeypatch.setattr(messages, "_IMAGE_CACHE_MAX_ENTRY_BYTES", 1024)
+
+
+def _cached_urls():
+    return list(messages._image_cache)
+
+
+def _assert_accounting():
+    assert messages._image_cache_bytes == sum(len(e.base64_string) for e in messages._image_cache.values())
+
+
+def test_repeated_fetches_are_served_from_cache(images):
+    first = get_image_base64_from_url("https://img.test/300/a")
+    assert get_image_base64_from_url("https://img.test/300/a") == first
+    assert asyncio.run(aget_image_base64_from_url("https://img.test/300/a")) == first
+    assert len(images.requests) == 1
+
+
+def test_stale_entries_are_revalidated(images, monkeypatch):
+    first = get_image_base64_from_url("https://img.test/300/a")
+    monkeypatch.setattr(messages, "_IMAGE_CACHE_TTL", 0.0)
+
+    assert get_image_base64_from_url("https://img.test/300/a") == first
+    assert asyncio.run(aget_image_base64_from_url("https://img.test/300/a")) == first
+    assert [r.headers.get("If-None-Match") for r in images.requests] == [None, '"v1"', '"v1"']
+    _assert_accounting()
+
+
+def test_cache_is_bounded_by_bytes(images, small_cache):
+    # 600 raw bytes are 800 base64 characters, so five fit in 4096
+    for name in "abcdef":
+        get_image_base64_from_url(f"https://img.test/600/{name}")
+
+    assert _cached_urls() == [f"https://img.test/600/{name}" for name in "bcdef"]
+    assert messages._image_cache_bytes == 5 * 800
+    _assert_accounting()
+
+
+def test_eviction_is_least_recently_used(images, small_cache):
+    for name in "abcde":
+        get_image_base64_from_url(f"https://img.test/600/{name}")
+    # A hit makes "a" the most recently used
+    get_image_base64_from_url("https://img.test/600/a")
+    get_image_base64_from_url("https://img.test/600/f")
+
+    assert "https://img.test/600/a" in _cached_urls()
+    assert "https://img.test/600/b" not in _cached_urls()
+
+
+def test_entries_above_the_cap_are_not_cached(images, small_cache):
+    for name in "abcde":
+        get_image_base64_from_url(f"https://img.test/600/{name}")
+    before = _cached_urls()
+
+    # 900 raw bytes are 1200 base64 characters, above the 1024 cap
+    result = get_image_base64_from_url("https://img.test/900/big")
+    get_image_base64_from_url("https://img.test/900/big")
+
+    assert result is not None
+    # Fetched both times, and the rest of the cache is untouched
+    assert sum(r.url.path == "/900/big" for r in images.requests) == 2
+    assert _cached_urls() == before
+    _assert_accounting()
+
+
+def test_default_entry_cap_is_an_eighth_of_the_budget():
+    assert messages._IMAGE_CACHE_MAX_ENTRY_BYTES == messages._IMAGE_CACHE_MAX_BYTES // 8
+
+
+def test_clear_image_cache(images):
+    get_image_base64_from_url("https://img.test/300/a")
+    messages.clear_image_cache()
+
+    assert _cached_urls() == []
+    assert messages._image_cache_bytes == 0
+    get_image_base64_from_url("https://img.test/300/a")
+    assert len(images.requests) == 2
@@ -0,0 +1,85 @@
+import asyncio
+import base64
+import os
+import random
+
+import httpx
+import pytest
+
+pytest.importorskip("custom_langchain_model.baml_client")
+
+from custom_langchain_model.helpers.messages import (
+    _Base64StreamEncoder,
+    aget_image_base64_from_url,
+    clear_image_cache,
+    get_image_base64_from_url,
+)
+
+PNG = b"\x89PNG\r\n\x1a\n" + os.urandom(1000)
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 4, 1000, 3 * 16 * 1024 + 1])
+def test_encoder_matches_b64encode(size):
+    data = os.urandom(size)
+    rng = random.Random(size)
+    encoder = _Base64StreamEncoder()
+    pos = 0
+    # Chunks of arbitrary, mostly unaligned sizes
+    while pos < size:
+        step = rng.randint(1, 100)
+        encoder.feed(data[pos:pos + step])
+        pos += step
+
+    assert encoder.finish() == base64.b64encode(data).decode("ascii")
+    assert encoder.head == data[:12]
+
+
+def test_encoder_enforces_max_bytes():
+    encoder = _Base64StreamEncoder(max_bytes=10)
+    encoder.feed(b"x" * 6)
+    encoder.feed(b"x" * 4)
+    with pytest.raises(ValueError, match="exceeds 10 bytes"):
+        encoder.feed(b"x")
+
+
+def test_fetch_encodes_the_body(serve_images):
+    serve_images(lambda request: httpx.Response(200, content=PNG, headers={"Content-Type": "image/png"}))
+
+    assert get_image_base64_from_url("https://img.test/a") == ("image/png", base64.b64encode(PNG).decode())
+    clear_image_cache()
+    assert asyncio.run(aget_image_base64_from_url("https://img.test/a")) == (
+        "image/png", base64.b64encode(PNG).decode()
+    )
+
+
+@pytest.mark.parametrize("url, headers, mime_type", [
+    # Octet-stream or no Content-Type: sniffed from the body
+    ("https://img.test/a", {"Content-Type": "application/octet-stream"}, "image/png"),
+    ("https://img.test/a", {}, "image/png"),
+])
+def test_mime_type_is_sniffed(serve_images, url, headers, mime_type):
+    serve_images(lambda request: httpx.Response(200, content=PNG, headers=headers))
+    assert get_image_base64_from_url(url)[0] == mime_type
+
+
+def test_mime_type_from_the_url_extension(serve_images):
+    serve_images(lambda request: httpx.Response(200, content=b"not an image"))
+    assert get_image_base64_from_url("https://img.test/a.gif")[0] == "image/gif"
+    assert get_image_base64_from_url("https://img.test/b")[0] == "image/jpeg"
+
+
+def test_oversized_bodies_are_rejected(serve_images):
+    # Without a Content-Length the limit applies while streaming
+    serve_images(lambda request: httpx.Response(200, content=iter([PNG[:600], PNG[600:]])))
+    assert get_image_base64_from_url("https://img.test/a", max_bytes=500) is None
+    assert asyncio.run(aget_image_base64_from_url("https://img.test/a", max_bytes=500)) is None
+
+    serve_images(lambda request: httpx.Response(200, content=PNG))
+    assert get_image_base64_from_url("https://img.test/b", max_bytes=len(PNG) - 1) is None
+    assert get_image_base64_from_url("https://img.test/b", max_bytes=len(PNG)) is not None
+
+
+def test_http_errors_return_none(serve_images):
+    serve_images(lambda request: httpx.Response(404))
+    assert get_image_base64_from_url("https://img.test/a") is None
+    assert asyncio.run(aget_image_base64_from_url("https://img.test/a")) is None
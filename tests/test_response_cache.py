@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("custom_langchain_model.baml_client")
+
+from langchain_core.messages import HumanMessage
+from pydantic import BaseModel
+
+from custom_langchain_model.llms.chat_baml import ChatBaml
+
+
+class get_weather(BaseModel):
+    """Weather for a city"""
+    city: str
+
+
+WEATHER_CALL = '{"selected_tool": {"name": "get_weather", "arguments": {"city": "Paris"}}}'
+
+
+@pytest.fixture
+def cached_chat(openai_server):
+    return ChatBaml(
+        api_key="test-key",
+        base_url=openai_server.base_url,
+        model="test-model",
+        temperature=0.0,
+        enable_response_cache=True,
+    )
+
+
+def test_hit(cached_chat, openai_server):
+    openai_server.replies.extend(["first", "second"])
+
+    assert cached_chat.invoke([HumanMessage("hi")]).content == "first"
+    assert cached_chat.invoke([HumanMessage("hi")]).content == "first"
+    assert asyncio.run(cached_chat.ainvoke([HumanMessage("hi")])).content == "first"
+    assert len(openai_server.requests) == 1
+
+
+def test_miss_on_different_request(cached_chat, openai_server):
+    openai_server.replies.extend(["first", "second", "third"])
+
+    assert cached_chat.invoke([HumanMessage("hi")]).content == "first"
+    assert cached_chat.invoke([HumanMessage("hello")]).content == "second"
+    # Same messages, but with tools
+    message = cached_chat.bind_tools([get_weather]).invoke([HumanMessage("hi")])
+    assert message.content == "third"
+    assert len(openai_server.requests) == 3
+
+
+def test_disabled_above_zero_temperature(openai_server):
+    chat = ChatBaml(
+        api_key="test-key",
+        base_url=openai_server.base_url,
+        model="test-model",
+        temperature=0.7,
+        enable_response_cache=True,
+    )
+    openai_server.replies.extend(["first", "second"])
+
+    assert chat.invoke([HumanMessage("hi")]).content == "first"
+    assert chat.invoke([HumanMessage("hi")]).content == "second"
+
+
+def test_disabled_with_server_side_tools(openai_server):
+    calls = []
+
+    def lookup(query: str) -> str:
+        """Looks something up"""
+        calls.append(query)
+        return "found"
+
+    chat = ChatBaml(
+        api_key="test-key",
+        base_url=openai_server.base_url,
+        model="test-model",
+        temperature=0.0,
+        enable_response_cache=True,
+        server_side_tools={"lookup": lookup},
+    )
+    tool_call = '{"selected_tool": {"name": "lookup", "arguments": {"query": "q"}}}'
+    openai_server.replies.extend([tool_call, "done", tool_call, "done again"])
+
+    bound = chat.bind_tools([lookup])
+    assert bound.invoke([HumanMessage("hi")]).content == "done"
+    assert bound.invoke([HumanMessage("hi")]).content == "done again"
+    # The tool ran for both requests
+    assert calls == ["q", "q"]
+
+
+def test_hit_is_not_affected_by_changes_to_earlier_results(cached_chat, openai_server):
+    openai_server.replies.append(WEATHER_CALL)
+
+    def call():
+        generation = cached_chat.generate([[HumanMessage("hi")]], tools=[get_weather]).generations[0][0]
+        return generation.generation_info["baml"], generation.message
+
+    first_result, first = call()
+    first_result.selected_tool["arguments"]["city"] = "Rome"
+    _, second = call()
+    second.tool_calls[0]["args"]["city"] = "Oslo"
+    _, third = call()
+
+    assert len(openai_server.requests) == 1
+    assert third.tool_calls[0]["args"] == {"city": "Paris"}
+    # Each hit still gets its own tool call id
+    assert len({first.tool_calls[0]["id"], second.tool_calls[0]["id"], third.tool_calls[0]["id"]}) == 3
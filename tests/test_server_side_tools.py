@@ -0,0 +1,180 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("custom_langchain_model.baml_client")
+
+from langchain_core.messages import HumanMessage
+from langchain_core.tools import tool
+from pydantic import BaseModel
+
+from custom_langchain_model.llms.chat_baml import ChatBaml
+
+
+class get_weather(BaseModel):
+    """Weather for a city"""
+    city: str
+
+
+def lookup(query: str) -> str:
+    """Looks something up"""
+    return f"result for {query}"
+
+
+def _call(name, **arguments):
+    return json.dumps({"selected_tool": {"name": name, "arguments": arguments}})
+
+
+def _prompt(body):
+    return json.dumps(body["messages"])
+
+
+def _system_prompt(body):
+    """The system message, where BAML renders the schema of the offered tools."""
+    return body["messages"][0]["content"]
+
+
+def _chat(openai_server, **kwargs):
+    return ChatBaml(api_key="test-key", base_url=openai_server.base_url, model="test-model", **kwargs)
+
+
+def test_tool_output_is_fed_back(openai_server):
+    chat = _chat(openai_server, server_side_tools={"lookup": lookup})
+    openai_server.replies.extend([_call("lookup", query="q"), "the answer"])
+
+    message = chat.bind_tools([lookup, get_weather]).invoke([HumanMessage("hi")])
+
+    assert message.content == "the answer"
+    assert not message.tool_calls
+    assert len(openai_server.requests) == 2
+    # The second request carries the call and its output
+    second = _prompt(openai_server.requests[1])
+    assert '\\"name\\": \\"lookup\\", \\"arguments\\": {\\"query\\": \\"q\\"}' in second
+    assert "result for q" in second
+
+
+def test_client_side_tool_calls_are_returned(openai_server):
+    chat = _chat(openai_server, server_side_tools={"lookup": lookup})
+    openai_server.replies.append(_call("get_weather", city="Paris"))
+
+    message = chat.bind_tools([lookup, get_weather]).invoke([HumanMessage("hi")])
+
+    assert message.tool_calls[0]["name"] == "get_weather"
+    assert len(openai_server.requests) == 1
+
+
+def test_async_tools_run_in_ainvoke(openai_server):
+    async def alookup(query: str) -> str:
+        """Looks something up"""
+        await asyncio.sleep(0)
+        return f"async result for {query}"
+
+    sync_calls = []
+
+    def record(query: str) -> str:
+        """Records the query"""
+        sync_calls.append(query)
+        return "recorded"
+
+    chat = _chat(openai_server, server_side_tools={"alookup": alookup, "record": record})
+    openai_server.replies.extend([_call("alookup", query="a"), _call("record", query="b"), "done"])
+
+    bound = chat.bind_tools([alookup, record])
+    message = asyncio.run(bound.ainvoke([HumanMessage("hi")]))
+
+    assert message.content == "done"
+    assert "async result for a" in _prompt(openai_server.requests[1])
+    assert sync_calls == ["b"]
+
+
+def test_async_tool_in_invoke_raises(openai_server):
+    async def alookup(query: str) -> str:
+        """Looks something up"""
+        return query
+
+    chat = _chat(openai_server, server_side_tools={"alookup": alookup})
+    openai_server.replies.append(_call("alookup", query="a"))
+
+    with pytest.raises(TypeError, match="ainvoke"):
+        chat.bind_tools([alookup]).invoke([HumanMessage("hi")])
+
+
+def test_base_tools(openai_server):
+    @tool
+    def search(query: str) -> str:
+        """Searches the web"""
+        return f"hits for {query}"
+
+    chat = _chat(openai_server, server_side_tools={"search": search})
+    openai_server.replies.extend([_call("search", query="s"), "found it", _call("search", query="t"), "again"])
+
+    bound = chat.bind_tools([search])
+    assert bound.invoke([HumanMessage("hi")]).content == "found it"
+    assert "hits for s" in _prompt(openai_server.requests[1])
+    assert asyncio.run(bound.ainvoke([HumanMessage("hi")])).content == "again"
+    assert "hits for t" in _prompt(openai_server.requests[3])
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_last_call_after_max_tool_rounds_has_no_server_side_tools(openai_server, use_async):
+    calls = []
+
+    def counted(query: str) -> str:
+        """Looks something up"""
+        calls.append(query)
+        return "again"
+
+    chat = _chat(openai_server, server_side_tools={"counted": counted}, max_tool_rounds=2)
+    # The model keeps asking for the server-side tool
+    openai_server.default_reply = lambda body: _call("counted", query="q")
+
+    bound = chat.bind_tools([counted, get_weather])
+    if use_async:
+        message = asyncio.run(bound.ainvoke([HumanMessage("hi")]))
+    else:
+        message = bound.invoke([HumanMessage("hi")])
+
+    assert calls == ["q", "q"]
+    assert len(openai_server.requests) == 4
+    # Only the client-side tool is offered in the final call
+    schemas = [_system_prompt(body) for body in openai_server.requests]
+    assert all('name: "counted"' in schema for schema in schemas[:3])
+    assert 'name: "get_weather"' in schemas[3] and 'name: "counted"' not in schemas[3]
+    # The caller never gets a server-side tool call back
+    assert all(call["name"] != "counted" for call in message.tool_calls)
+
+
+def test_tool_errors_propagate(openai_server):
+    def broken(query: str) -> str:
+        """Always fails"""
+        raise LookupError("no such thing")
+
+    chat = _chat(openai_server, server_side_tools={"broken": broken})
+    openai_server.replies.extend([_call("broken", query="q"), _call("broken", query="q")])
+
+    bound = chat.bind_tools([broken])
+    with pytest.raises(LookupError, match="no such thing"):
+        bound.invoke([HumanMessage("hi")])
+    with pytest.raises(LookupError, match="no such thing"):
+        asyncio.run(bound.ainvoke([HumanMessage("hi")]))
+
+
+def test_streaming_returns_the_tool_call(openai_server):
+    calls = []
+
+    def counted(query: str) -> str:
+        """Looks something up"""
+        calls.append(query)
+        return "x"
+
+    chat = _chat(openai_server, server_side_tools={"counted": counted})
+    openai_server.replies.append(_call("counted", query="q"))
+
+    async def run():
+        return [chunk async for chunk in chat.bind_tools([counted]).astream([HumanMessage("hi")])]
+
+    chunks = asyncio.run(run())
+
+    assert [c.tool_calls[0]["name"] for c in chunks if c.tool_calls] == ["counted"]
+    assert calls == []
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("custom_langchain_model.baml_client")
+
+from langchain_core.messages import HumanMessage
+
+from custom_langchain_model.baml_client.runtime import BamlCallOptions
+from custom_langchain_model.llms.chat_baml import ChatBaml, _active_streams
+
+
+def test_abort_controller_is_a_baml_call_option():
+    # _astream() passes the controller under this key, BAML ignores unknown ones
+    assert "abort_controller" in BamlCallOptions.__annotations__
+
+
+def test_cancel_running_stream(chat, openai_server):
+    openai_server.replies.append(" ".join(f"w{i}" for i in range(200)))
+    openai_server.stream_delay = 0.02
+
+    async def run():
+        chunks = []
+        async for chunk in chat.astream([HumanMessage("hi")], stream_id="s1"):
+            chunks.append(chunk.content)
+            if len(chunks) == 3:
+                assert ChatBaml.cancel_stream("s1")
+        return chunks
+
+    chunks = asyncio.run(run())
+
+    # Ends without an error, well before the 200 chunks the server would send
+    assert 3 <= len(chunks) < 200
+    assert "".join(chunks).startswith("w0 w1 w2")
+    assert "s1" not in _active_streams
+    # The BAML request itself was aborted, not just left unread
+    assert openai_server.stream_aborted.wait(5)
+
+
+def test_stream_ids_are_released(chat, openai_server):
+    openai_server.replies.extend(["one two", "three four"])
+
+    async def run():
+        first = [c.content async for c in chat.astream([HumanMessage("hi")], stream_id="s1")]
+        second = [c.content async for c in chat.astream([HumanMessage("hi")], stream_id="s1")]
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert "".join(first).split() == ["one", "two"]
+    assert "".join(second).split() == ["three", "four"]
+    assert "s1" not in _active_streams
+    assert not ChatBaml.cancel_stream("s1")
+
+
+def test_duplicate_stream_id_rejected(chat, openai_server):
+    openai_server.replies.append("a b c d e f")
+    openai_server.stream_delay = 0.05
+
+    async def run():
+        stream = chat.astream([HumanMessage("hi")], stream_id="s1")
+        await stream.__anext__()
+        try:
+            with pytest.raises(ValueError, match="already running"):
+                async for _ in chat.astream([HumanMessage("hi")], stream_id="s1"):
+                    pass
+            # The running stream still owns its id
+            assert "s1" in _active_streams
+        finally:
+            ChatBaml.cancel_stream("s1")
+            async for _ in stream:
+                pass
+
+    asyncio.run(run())
+    assert "s1" not in _active_streams